@@ -1,42 +1,77 @@
+import asyncio
+import json
+import math
 import os
+import time
 from dotenv import load_dotenv
-from fastapi import FastAPI, UploadFile, File, Form, Depends, HTTPException, Request
-from supabase import create_client, Client
+from fastapi import FastAPI, UploadFile, File, Form, Depends, HTTPException, Request, BackgroundTasks
 from pydantic import BaseModel
 from typing import List
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import FileResponse 
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-import pdfplumber
-
-from utils.text_cleaner import clean_text
-from utils.ats_matcher import extract_skills_from_text, match_skills
-from utils.semantic_matcher import calculate_semantic_match
-from utils.resume_rewriter import optimize_bullet_point
-from utils.learning_roadmap import generate_study_plan
-from utils.cover_letter_generator import generate_cover_letter  
-from utils.interview_prep import generate_interview_questions 
-from utils.github_scanner import analyze_github_profile, generate_dev_scorecard
-from utils.pdf_generator import create_pdf_report
-from utils.dsa_interviewer import generate_dsa_question, evaluate_dsa_answer, get_dsa_hint
-
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-
-# 1. Load environment variables
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile as FormFile
+
+# 1. Load environment variables (before the utils modules read their settings)
 load_dotenv()
+
+from utils.resume_cache import parse_resume_async, resume_cache
+from utils.jd_profile import get_jd_profile, get_jd_profile_by_id, match_resume_to_jd, jd_cache
+from utils.semantic_matcher import get_idf_table, rank_documents
+from utils.bulk_screening import SCREEN_MAX_FILES, SCREEN_MAX_REQUEST_BYTES, ScreeningError, iter_sources, limit_body, screen_resumes
+from utils.resume_rewriter import optimize_bullet_point, optimize_bullet_points
+from utils.learning_roadmap import generate_study_plan, stream_study_plan
+from utils.cover_letter_generator import generate_cover_letter_async, stream_cover_letter
+from utils.interview_prep import stream_interview_questions
+from utils.github_scanner import analyze_github_profile_async, generate_dev_scorecard_async
+from utils.github_cache import cache_stats as github_cache_stats
+from utils.http_client import close_http_client
+from utils.pdf_pool import pdf_pool
+from utils import repositories as db
+from utils.response_encoding import FastJSONResponse, ResponseEncodingMiddleware
+from utils.pagination import APPLICATION_COLUMNS, HISTORY_COLUMNS, decode_cursor, page_body, page_size, projection
+from utils.rate_limiter import ENDPOINT_COSTS, rate_limiter
+from utils.token_auth import AuthUnavailable, InvalidToken, auth_stats, known_user, verify_token
+from utils.single_flight import single_flight_stats
+from utils import telemetry
+from utils.telemetry import TelemetryMiddleware, traced, upstream
+from utils.metrics import counter_lines
+from utils.write_behind import WRITE_BEHIND_ENABLED, evaluation_writes, history_writes, close_write_buffers, write_buffer_stats
+from utils.llm_cache import llm_cache
+from utils import llm_gateway
+from utils.report_cache import etag_for, etag_matches, get_report, report_cache, report_key
+from utils.dsa_interviewer import generate_dsa_question_async, evaluate_dsa_answer_async, get_dsa_hint_async
+
+
 supabase_url = os.getenv("SUPABASE_URL")
 supabase_key = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(supabase_url, supabase_key)
+_supabase = None
+
+def get_supabase():
+    """The supabase SDK is slow to import, so the client is only built on first use (keeps cold starts fast)."""
+    global _supabase
+    if _supabase is None:
+        from supabase import create_client
+        _supabase = create_client(supabase_url, supabase_key)
+    return _supabase
 
 # 2. Initialize App
 app = FastAPI(
     title="AI Career Coach API",
     description="The backend engine for the v2.0 Resume Analyzer",
-    version="2.0.0"
+    version="2.0.0",
+    # orjson bodies (MessagePack on request); compression is done by ResponseEncodingMiddleware below
+    default_response_class=FastJSONResponse
 )
 
+@app.on_event("shutdown")
+async def shutdown_outbound_clients():
+    # Buffered rows go out before the HTTP pool they are written through is closed
+    await close_write_buffers()
+    await close_http_client()
+    await run_in_threadpool(pdf_pool.shutdown)
+
 # --- PRODUCTION CORS SETUP ---
 app.add_middleware(
     CORSMiddleware,
@@ -49,10 +84,11 @@ app.add_middleware(
     allow_headers=["*"], 
 )
 
-# 3. Initialize the Rate Limiter
-limiter = Limiter(key_func=get_remote_address)
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+# gzip/brotli for large responses, negotiated from Accept-Encoding
+app.add_middleware(ResponseEncodingMiddleware)
+
+# Per-route latency and the Server-Timing header (only with METRICS_ENABLED=true); outermost, so it times everything
+app.add_middleware(TelemetryMiddleware)
 
 # --- DATA MODELS ---
 class UserCredentials(BaseModel):
@@ -82,6 +118,9 @@ class HistoryCreate(BaseModel):
 class RewriteRequest(BaseModel):
     bullet_point: str
 
+class BatchRewriteRequest(BaseModel):
+    bullet_points: List[str]
+
 class CoverLetterRequest(BaseModel):
     resume_text: str
     job_description: str
@@ -93,6 +132,14 @@ class InterviewPrepRequest(BaseModel):
     resume_text: str
     job_role: str
 
+class JobDescriptionCreate(BaseModel):
+    job_description: str
+
+class RankCandidatesRequest(BaseModel):
+    job_description: str
+    resumes: List[str]
+    mode: str = "tfidf"
+
 class JobApplicationCreate(BaseModel):
     company_name: str
     job_title: str
@@ -101,18 +148,127 @@ class JobApplicationCreate(BaseModel):
 class JobApplicationUpdate(BaseModel):
     status: str
 
+# --- PDF INGESTION ---
+async def read_resume(resume: UploadFile) -> dict:
+    """
+    Parses an uploaded resume off the event loop. Returns raw_text, cleaned_text and skills;
+    the same file uploaded again (to any endpoint) comes straight from the resume cache.
+    """
+    return await parse_resume_async(await resume.read())
+
+# --- JOB DESCRIPTIONS ---
+async def resolve_jd_profile(job_description: str = None, jd_id: str = None) -> dict:
+    """
+    The parsed JD for a request: by jd_id if the client registered it, else from the raw text
+    (which is cached by content hash too). Raises ValueError if neither is usable.
+    """
+    if jd_id:
+        profile = get_jd_profile_by_id(jd_id)
+        if profile is not None:
+            return profile
+        # Registered through another worker (or evicted here): rebuild it from the stored text
+        text = await db.job_descriptions.get_text(jd_id)
+        if text is not None:
+            return get_jd_profile(text)
+        if not job_description:
+            raise ValueError("Unknown jd_id. Register the job description again via /api/job-descriptions.")
+    if not job_description:
+        raise ValueError("Send either job_description or jd_id.")
+    return get_jd_profile(job_description)
+
+# --- PAGINATION ---
+async def paged_response(request: Request, fetch_page, limit, cursor, fields, allowed_columns):
+    """
+    One keyset page as a JSON response with an ETag. The body is serialized once;
+    if the client already has this exact page it gets a bare 304.
+    """
+    try:
+        limit = page_size(limit)
+        columns = projection(fields, allowed_columns)
+        after = decode_cursor(cursor)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+
+    rows = await fetch_page(limit + 1, after, columns)
+    body, etag = page_body(rows, limit)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# --- STREAMING ---
+def sse_response(endpoint: str, chunks, started_at: float):
+    """
+    Wraps an async generator of text chunks as Server-Sent Events.
+    Each chunk is a `data:` event; a final `done` event reports time-to-first-byte and total time.
+    """
+    async def events():
+        first_chunk_at = None
+        try:
+            async for chunk in chunks:
+                if first_chunk_at is None:
+                    first_chunk_at = time.perf_counter()
+                yield f"data: {json.dumps({'text': chunk})}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'message': str(e)})}\n\n"
+
+        finished_at = time.perf_counter()
+        ttfb = (first_chunk_at or finished_at) - started_at
+        total = finished_at - started_at
+        llm_gateway.stream_timings.record(endpoint, ttfb, total)
+        yield f"event: done\ndata: {json.dumps({'ttfb_ms': round(ttfb * 1000, 1), 'total_ms': round(total * 1000, 1)})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # --- SECURITY CHECKPOINT ---
 security = HTTPBearer()
 
+async def fetch_supabase_user(token: str):
+    with upstream("supabase-auth"):
+        return await run_in_threadpool(get_supabase().auth.get_user, token)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
+    # Verified locally against the project's JWT secret / JWKS; repeat tokens come from a cache
     try:
-        user_response = supabase.auth.get_user(token)
-        if not user_response.user:
-            raise HTTPException(status_code=401, detail="Invalid or expired token")
-        return user_response.user
-    except Exception as e:
+        return await verify_token(credentials.credentials, fetch_supabase_user)
+    except InvalidToken as e:
         raise HTTPException(status_code=401, detail=f"Authentication failed: {str(e)}")
+    except AuthUnavailable as e:
+        raise HTTPException(status_code=503, detail=f"Authentication is temporarily unavailable: {str(e)}")
+
+# --- RATE LIMITING ---
+def rate_limit_key(request: Request) -> str:
+    """
+    Signed-in callers are limited per user (across devices); everyone else per IP. Only tokens
+    known without calling out count as signed in, so junk tokens never cost a Supabase round trip.
+    """
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        user = known_user(authorization[7:].strip())
+        if user is not None:
+            return f"user:{user.id}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+async def enforce_rate_limit(request: Request, endpoint: str, cost: float):
+    """Charges `cost` estimated Gemini tokens to the caller's bucket, or answers 429."""
+    allowed, retry_after = await rate_limiter.take(rate_limit_key(request), endpoint, cost)
+    if not allowed:
+        seconds = max(1, math.ceil(retry_after))
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded. Try again in {seconds}s.",
+            headers={"Retry-After": str(seconds)},
+        )
+
+def rate_limit(endpoint: str):
+    """Route dependency charging the endpoint's ENDPOINT_COSTS entry."""
+    async def charge(request: Request):
+        await enforce_rate_limit(request, endpoint, ENDPOINT_COSTS[endpoint])
+    return Depends(charge)
 
 @app.get("/")
 def read_root():
@@ -121,40 +277,132 @@ def read_root():
 @app.get("/test-db")
 def test_database_connection():
     try:
-        if supabase:
+        if get_supabase():
             return {"status": "Success", "message": "Successfully connected to Supabase PostgreSQL! 🎉"}
     except Exception as e:
         return {"status": "Error", "message": str(e)}
 
+# --- OPERATIONAL STATS ---
+def require_metrics_access(request: Request):
+    """
+    Guards /metrics and the /api/*-stats endpoints: not found unless METRICS_ENABLED=true,
+    and they need the bearer METRICS_TOKEN if one is set.
+    """
+    if not telemetry.enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not telemetry.scrape_authorized(request.headers.get("authorization")):
+        raise HTTPException(status_code=401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"})
+
+metrics_access = [Depends(require_metrics_access)]
+
+@app.get("/api/cache-stats", dependencies=metrics_access)
+def get_cache_stats():
+    return {
+        "status": "success",
+        "data": {
+            "resume": resume_cache.stats(),
+            "reports": report_cache.stats(),
+            "job_descriptions": jd_cache.stats(),
+            "github": github_cache_stats(),
+            "llm": llm_cache.stats(),
+            "auth_tokens": auth_stats(),
+            "single_flight": single_flight_stats(),
+        }
+    }
+
+@app.get("/api/llm-stats", dependencies=metrics_access)
+def get_llm_stats():
+    return {
+        "status": "success",
+        "data": {
+            **llm_gateway.stats.snapshot(),
+            "concurrency": llm_gateway.slots.snapshot(),
+            "streams": llm_gateway.stream_timings.snapshot(),
+        }
+    }
+
+@app.get("/api/db-stats", dependencies=metrics_access)
+def get_db_stats():
+    """Latency histogram of every repository call, plus the write-behind buffers (buffered/dropped rows)."""
+    return {
+        "status": "success",
+        "data": {
+            "backend": db.active_backend,
+            "latency": db.db_latency.snapshot(),
+            "write_behind": write_buffer_stats(),
+        }
+    }
+
+@app.get("/api/rate-limit-stats", dependencies=metrics_access)
+def get_rate_limit_stats():
+    return {"status": "success", "data": rate_limiter.stats()}
+
+@app.get("/api/pdf-stats", dependencies=metrics_access)
+def get_pdf_stats():
+    """PDF worker pool: queue depth, busy workers, timeouts, memory kills and recycling."""
+    return {"status": "success", "data": pdf_pool.stats()}
+
+@app.get("/metrics", include_in_schema=False, dependencies=metrics_access)
+def get_metrics():
+    """
+    Prometheus scrape target: endpoint, span and upstream histograms plus DB latency, cache, coalescing
+    and rate-limit counters.
+    """
+    caches = {
+        "resume": resume_cache.stats(),
+        "reports": report_cache.stats(),
+        "job_descriptions": jd_cache.stats(),
+        "github": github_cache_stats(),
+        "auth_tokens": auth_stats(),
+    }
+    for endpoint, counters in llm_cache.stats()["endpoints"].items():
+        caches[f"llm.{endpoint}"] = {"hits": counters["memory_hits"] + counters["disk_hits"], "misses": counters["misses"]}
+    flights = single_flight_stats()
+    gemini = llm_gateway.stats.snapshot()
+
+    lines = [
+        *telemetry.prometheus_lines(),
+        *db.db_latency.prometheus("db_query_duration_seconds", "operation"),
+        *counter_lines("cache_hits_total", "cache", {name: s["hits"] for name, s in caches.items()}),
+        *counter_lines("cache_misses_total", "cache", {name: s["misses"] for name, s in caches.items()}),
+        *counter_lines("single_flight_calls_total", "flight", {name: s["calls"] for name, s in flights.items()}),
+        *counter_lines("single_flight_coalesced_total", "flight", {name: s["coalesced"] for name, s in flights.items()}),
+        *counter_lines("gemini_requests_total", "result", {"ok": gemini["calls"] - gemini["errors"], "error": gemini["errors"]}),
+        *counter_lines("rate_limit_rejections_total", "endpoint", {name: c["limited"] for name, c in rate_limiter.stats()["endpoints"].items()}),
+        *counter_lines("write_behind_dropped_total", "buffer", {name: s["dropped"] for name, s in write_buffer_stats().items()}),
+    ]
+    return Response(content="\n".join(lines) + "\n", media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # --- KANBAN BOARD ROUTES ---
 
 @app.post("/api/applications")
 async def create_application(app_data: JobApplicationCreate, user = Depends(get_current_user)):
     try:
-        response = supabase.table("job_applications").insert({
-            "user_id": user.id,
-            "company_name": app_data.company_name,
-            "job_title": app_data.job_title,
-            "match_score": app_data.match_score,
-            "status": "Saved"
-        }).execute()
-        return {"status": "success", "data": response.data}
+        rows = await db.applications.create(user.id, app_data.company_name, app_data.job_title, app_data.match_score)
+        return {"status": "success", "data": rows}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 @app.get("/api/applications")
-async def get_applications(user = Depends(get_current_user)):
+async def get_applications(
+    request: Request,
+    limit: int = None,
+    cursor: str = None,
+    fields: str = None,
+    user = Depends(get_current_user)
+):
+    """Newest first, one page at a time: pass next_cursor back as ?cursor= for the next page."""
     try:
-        response = supabase.table("job_applications").select("*").eq("user_id", user.id).order("created_at", desc=True).execute()
-        return {"status": "success", "data": response.data}
+        fetch = lambda size, after, columns: db.applications.page_for_user(user.id, size, after, columns)
+        return await paged_response(request, fetch, limit, cursor, fields, APPLICATION_COLUMNS)
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 @app.patch("/api/applications/{app_id}")
 async def update_application_status(app_id: str, update_data: JobApplicationUpdate, user = Depends(get_current_user)):
     try:
-        response = supabase.table("job_applications").update({"status": update_data.status}).eq("id", app_id).eq("user_id", user.id).execute()
-        return {"status": "success", "data": response.data}
+        rows = await db.applications.update_status(app_id, user.id, update_data.status)
+        return {"status": "success", "data": rows}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -162,53 +410,61 @@ async def update_application_status(app_id: str, update_data: JobApplicationUpda
 # --- ROUTES ---
 
 @app.post("/api/history")
-def save_history(data: HistoryCreate):
+async def save_history(data: HistoryCreate):
     try:
-        response = supabase.table("resume_history").insert({
+        row = {
             "user_email": data.user_email,
             "match_score": data.match_score,
             "semantic_score": data.semantic_score,
             "missing_skills": data.missing_skills
-        }).execute()
-        return {"status": "success", "data": response.data}
+        }
+        if not WRITE_BEHIND_ENABLED:
+            rows = await db.history.add(row)
+            return {"status": "success", "data": rows}
+        # Queued for the next bulk insert; the response doesn't wait for the database (so has no id yet)
+        if not history_writes.add(row):
+            return {"status": "error", "message": "History is temporarily unavailable. Please try again."}
+        return {"status": "success", "queued": True, "data": [row]}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 @app.get("/api/history/{email}")
-def get_history(email: str):
+async def get_history(request: Request, email: str, limit: int = None, cursor: str = None, fields: str = None):
+    """Newest first, one page at a time: pass next_cursor back as ?cursor= for the next page."""
+    try:
+        fetch = lambda size, after, columns: db.history.page_for_email(email, size, after, columns)
+        return await paged_response(request, fetch, limit, cursor, fields, HISTORY_COLUMNS)
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@app.post("/api/job-descriptions")
+async def register_job_description(data: JobDescriptionCreate):
+    """Parses a JD once. Pass the returned jd_id to /api/analyze or /api/evaluate-candidate instead of the text."""
     try:
-        response = supabase.table("resume_history").select("*").eq("user_email", email).execute()
-        return {"status": "success", "data": response.data}
+        profile = await run_in_threadpool(get_jd_profile, data.job_description)
+        # Stored before we answer, so whichever worker gets the next request can find it
+        await db.job_descriptions.save(profile["jd_id"], profile["text"])
+        return {"status": "success", "jd_id": profile["jd_id"], "skills": sorted(profile["skills"])}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 @app.post("/api/analyze")
 async def analyze_resume(
     resume: UploadFile = File(...),
-    job_description: str = Form(...)
+    job_description: str = Form(None),
+    jd_id: str = Form(None)
 ):
     try:
         if resume.content_type != "application/pdf":
             return {"status": "error", "message": "Please upload a valid PDF file."}
 
-        text = ""
-        with pdfplumber.open(resume.file) as pdf:
-            for page in pdf.pages:
-                extracted = page.extract_text()
-                if extracted:
-                    text += extracted + "\n"
+        jd_profile = await resolve_jd_profile(job_description, jd_id)
+        parsed = await read_resume(resume)
         
-        if not text.strip():
+        if not parsed["raw_text"].strip():
             return {"status": "error", "message": "Could not extract text. The PDF might be an image."}
 
-        cleaned_text = clean_text(text)
-        resume_skills = extract_skills_from_text(cleaned_text)
-        
-        jd_clean = job_description.lower()
-        jd_skills = extract_skills_from_text(jd_clean)
-        
-        match_pct, matched, missing = match_skills(resume_skills, jd_skills)
-        sem_score = calculate_semantic_match(cleaned_text, jd_clean)
+        match_pct, matched, missing, sem_score = match_resume_to_jd(parsed["skills"], parsed["cleaned_text"], jd_profile)
 
         return {
             "status": "success",
@@ -222,7 +478,25 @@ async def analyze_resume(
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-@app.post("/api/rewrite")
+MAX_RANK_POOL = int(os.getenv("MAX_RANK_POOL", "500"))
+
+@app.post("/api/rank-candidates")
+def api_rank_candidates(data: RankCandidatesRequest):
+    """Ranks a pool of resume texts against one JD (modes: jaccard, tfidf, bm25)."""
+    if len(data.resumes) > MAX_RANK_POOL:
+        return {"status": "error", "message": f"Send at most {MAX_RANK_POOL} resumes per ranking."}
+    try:
+        # The reference IDF table (IDF_TABLE_PATH) keeps scores independent of who else is in the pool
+        ranking = rank_documents(data.job_description.lower(), data.resumes, data.mode, get_idf_table())
+        return {
+            "status": "success",
+            "mode": data.mode,
+            "ranking": [{"index": index, "score": score} for index, score in ranking]
+        }
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@app.post("/api/rewrite", dependencies=[rate_limit("rewrite")])
 def api_rewrite_bullet(data: RewriteRequest):
     try:
         improved_text = optimize_bullet_point(data.bullet_point)
@@ -234,7 +508,19 @@ def api_rewrite_bullet(data: RewriteRequest):
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-@app.post("/api/study-plan")
+MAX_REWRITE_BATCH = 50
+
+@app.post("/api/rewrite/batch")
+async def api_rewrite_bullets(request: Request, data: BatchRewriteRequest):
+    if len(data.bullet_points) > MAX_REWRITE_BATCH:
+        return {"status": "error", "message": f"Send at most {MAX_REWRITE_BATCH} bullet points per batch."}
+    await enforce_rate_limit(request, "rewrite", ENDPOINT_COSTS["rewrite"] * len(data.bullet_points))
+    try:
+        return {"status": "success", "results": await run_in_threadpool(optimize_bullet_points, data.bullet_points)}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@app.post("/api/study-plan", dependencies=[rate_limit("study-plan")])
 def api_study_plan(data: StudyPlanRequest):
     try:
         plan = generate_study_plan(data.missing_skills)
@@ -242,7 +528,7 @@ def api_study_plan(data: StudyPlanRequest):
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-@app.post("/api/cover-letter")
+@app.post("/api/cover-letter", dependencies=[rate_limit("cover-letter")])
 async def api_cover_letter(
     job_description: str = Form(...),
     resume: UploadFile = File(...)
@@ -251,67 +537,143 @@ async def api_cover_letter(
         if resume.content_type != "application/pdf":
             return {"status": "error", "message": "Please upload a valid PDF file."}
 
-        text = ""
-        with pdfplumber.open(resume.file) as pdf:
-            for page in pdf.pages:
-                extracted = page.extract_text()
-                if extracted:
-                    text += extracted + "\n"
+        text = (await read_resume(resume))["raw_text"]
 
-        cover_letter = generate_cover_letter(text, job_description)
+        cover_letter = await generate_cover_letter_async(text, job_description)
         return {"status": "success", "cover_letter": cover_letter}
         
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+# --- BULK SCREENING (NDJSON) ---
+
+@app.post("/api/screen")
+async def api_screen_resumes(request: Request):
+    """
+    Scores many resumes (PDFs and/or ZIPs of PDFs) against one JD.
+    Form fields: resumes (repeated files), job_description or jd_id.
+    Streams one JSON line per candidate as each finishes, then a ranked summary line.
+    """
+    # The form is parsed here rather than by FastAPI, so the file count and body size are
+    # enforced while the upload arrives instead of after all of it is in memory
+    if int(request.headers.get("content-length") or 0) > SCREEN_MAX_REQUEST_BYTES:
+        return {"status": "error", "message": f"Upload too large. Send at most {SCREEN_MAX_REQUEST_BYTES // (1024 * 1024)}MB per batch."}
+    try:
+        form = await Request(request.scope, limit_body(request.receive)).form(max_files=SCREEN_MAX_FILES, max_fields=10)
+    except ScreeningError as e:
+        return {"status": "error", "message": str(e)}
+
+    try:
+        resumes = [item for item in form.getlist("resumes") if isinstance(item, FormFile)]
+        if not resumes:
+            raise ValueError("Attach at least one resume.")
+        jd_profile = await resolve_jd_profile(form.get("job_description"), form.get("jd_id"))
+    except Exception as e:
+        await form.close()
+        return {"status": "error", "message": str(e)}
+
+    async def lines():
+        try:
+            async for result in screen_resumes(iter_sources(resumes), jd_profile):
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            yield json.dumps({"type": "error", "message": str(e)}) + "\n"
+        finally:
+            await form.close()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
+# --- STREAMING VERSIONS (Server-Sent Events) ---
+
+@app.post("/api/study-plan/stream", dependencies=[rate_limit("study-plan")])
+async def api_study_plan_stream(data: StudyPlanRequest):
+    return sse_response("study-plan", stream_study_plan(data.missing_skills), time.perf_counter())
+
+@app.post("/api/cover-letter/stream", dependencies=[rate_limit("cover-letter")])
+async def api_cover_letter_stream(
+    job_description: str = Form(...),
+    resume: UploadFile = File(...)
+):
+    started_at = time.perf_counter()
+    try:
+        if resume.content_type != "application/pdf":
+            return {"status": "error", "message": "Please upload a valid PDF file."}
+
+        text = (await read_resume(resume))["raw_text"]
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+    return sse_response("cover-letter", stream_cover_letter(text, job_description), started_at)
+
+@app.post("/api/interview-prep/stream", dependencies=[rate_limit("interview-prep")])
+async def api_interview_prep_stream(data: InterviewPrepRequest):
+    return sse_response("interview-prep", stream_interview_questions(data.resume_text, data.job_role), time.perf_counter())
+
 # --- THE MASTER ENDPOINT ---
 
-@app.post("/api/evaluate-candidate")
-@limiter.limit("5/minute") 
+@traced("stage.resume")
+async def analyze_resume_stage(resume: UploadFile, jd_profile: dict):
+    """Resume side of the evaluation: parse, skill match and semantic score."""
+    parsed = await read_resume(resume)
+    return match_resume_to_jd(parsed["skills"], parsed["cleaned_text"], jd_profile)
+
+@traced("stage.github")
+async def github_stage(github_username: str):
+    """GitHub side of the evaluation. The scorecard starts as soon as the repo data arrives."""
+    github_data = await analyze_github_profile_async(github_username)
+
+    if github_data and isinstance(github_data, dict) and "public_repos" in github_data:
+        github_data["ai_scorecard"] = await generate_dev_scorecard_async(github_data)
+    else:
+        github_data = {"public_repos": 0, "total_stars": 0, "total_forks": 0, "top_languages": {}, "ai_scorecard": "No GitHub data found."}
+    return github_data
+
+async def save_evaluation(db_record: dict):
+    """Runs as a background task after the response has been sent."""
+    try:
+        await db.evaluations.add(db_record)
+    except Exception as db_error:
+        print(f"Database warning: Could not save record. {db_error}")
+
+@app.post("/api/evaluate-candidate", dependencies=[rate_limit("evaluate-candidate")])
 async def evaluate_candidate(
     request: Request, 
+    background_tasks: BackgroundTasks,
     github_username: str = Form(...),
-    job_description: str = Form(...),
+    job_description: str = Form(None),
+    jd_id: str = Form(None),
     resume: UploadFile = File(...)
 ):
     try:
         if resume.content_type != "application/pdf":
             return {"status": "error", "message": "Please upload a valid PDF file."}
 
-        text = ""
-        with pdfplumber.open(resume.file) as pdf:
-            for page in pdf.pages:
-                extracted = page.extract_text()
-                if extracted:
-                    text += extracted + "\n"
-
-        cleaned_text = clean_text(text)
-        resume_skills = extract_skills_from_text(cleaned_text)
-        jd_clean = job_description.lower()
-        jd_skills = extract_skills_from_text(jd_clean)
-        
-        match_pct, matched, missing = match_skills(resume_skills, jd_skills)
-        sem_score = calculate_semantic_match(cleaned_text, jd_clean)
-
-        github_data = analyze_github_profile(github_username)
-        
-        if github_data and isinstance(github_data, dict) and "public_repos" in github_data:
-            github_data["ai_scorecard"] = generate_dev_scorecard(github_data)
-        else:
-            github_data = {"public_repos": 0, "total_stars": 0, "total_forks": 0, "top_languages": {}, "ai_scorecard": "No GitHub data found."}
+        jd_profile = await resolve_jd_profile(job_description, jd_id)
 
+        # The resume and GitHub stages don't depend on each other, so run them side by side
+        resume_task = asyncio.create_task(analyze_resume_stage(resume, jd_profile))
+        github_task = asyncio.create_task(github_stage(github_username))
         try:
-            db_record = {
-                "github_username": github_username,
-                "ats_score": float(match_pct),
-                "semantic_score": float(sem_score),
-                "ai_scorecard": github_data.get("ai_scorecard", ""),
-                "matched_skills": list(matched),
-                "missing_skills": list(missing)
-            }
-            supabase.table("evaluations").insert(db_record).execute()
-        except Exception as db_error:
-            print(f"Database warning: Could not save record. {db_error}")
+            (match_pct, matched, missing, sem_score), github_data = await asyncio.gather(resume_task, github_task)
+        except BaseException:
+            # One stage failed (or the client went away): don't leave the other one running
+            resume_task.cancel()
+            github_task.cancel()
+            raise
+
+        db_record = {
+            "github_username": github_username,
+            "ats_score": float(match_pct),
+            "semantic_score": float(sem_score),
+            "ai_scorecard": github_data.get("ai_scorecard", ""),
+            "matched_skills": list(matched),
+            "missing_skills": list(missing)
+        }
+        if WRITE_BEHIND_ENABLED:
+            # Written in bulk by the write-behind buffer, off the request path
+            evaluation_writes.add(db_record)
+        else:
+            background_tasks.add_task(save_evaluation, db_record)
 
         return {
             "status": "success",
@@ -329,13 +691,13 @@ async def evaluate_candidate(
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-@app.get("/api/github/{username}")
-def api_get_github_profile(username: str):
+@app.get("/api/github/{username}", dependencies=[rate_limit("github-profile")])
+async def api_get_github_profile(username: str):
     try:
-        result = analyze_github_profile(username)
+        result = await analyze_github_profile_async(username)
         
         if result and isinstance(result, dict) and "public_repos" in result:
-            ai_summary = generate_dev_scorecard(result)
+            ai_summary = await generate_dev_scorecard_async(result)
             result["ai_scorecard"] = ai_summary
             return {"status": "success", "data": result}
         
@@ -348,19 +710,19 @@ def api_get_github_profile(username: str):
 @app.post("/api/signup")
 async def sign_up(credentials: UserSignUp):
     try:
-        response = supabase.auth.sign_up({
+        response = await run_in_threadpool(get_supabase().auth.sign_up, {
             "email": credentials.email,
             "password": credentials.password
         })
         
         if response.user:
-            supabase.table("profiles").upsert({
+            await db.profiles.upsert({
                 "id": response.user.id,
                 "email": credentials.email,
                 "first_name": credentials.first_name,
                 "last_name": credentials.last_name,
                 "target_role": credentials.target_role
-            }).execute()
+            })
             
         return {
             "status": "success", 
@@ -372,7 +734,7 @@ async def sign_up(credentials: UserSignUp):
 @app.post("/api/login")
 async def log_in(credentials: UserCredentials):
     try:
-        response = supabase.auth.sign_in_with_password({
+        response = await run_in_threadpool(get_supabase().auth.sign_in_with_password, {
             "email": credentials.email,
             "password": credentials.password
         })
@@ -393,8 +755,7 @@ async def log_in(credentials: UserCredentials):
 @app.get("/api/me")
 async def get_my_profile(user = Depends(get_current_user)):
     try:
-        profile_response = supabase.table("profiles").select("*").eq("id", user.id).execute()
-        profile_data = profile_response.data[0] if profile_response.data else {}
+        profile_data = await db.profiles.get(user.id) or {}
 
         return {
             "status": "success",
@@ -408,51 +769,48 @@ async def get_my_profile(user = Depends(get_current_user)):
 
 # --- PDF GENERATION ---
 @app.post("/api/generate-pdf")
-async def generate_pdf(eval_data: dict):
+async def generate_pdf(request: Request, eval_data: dict, renderer: str = "fpdf"):
     try:
-        temp_filename = "candidate_report.pdf"
-        create_pdf_report(eval_data, temp_filename)
-        return FileResponse(
-            path=temp_filename, 
-            filename="AI_Developer_Scorecard.pdf", 
-            media_type="application/pdf"
-        )
+        # The ETag is derived from the evaluation itself, so a repeat download is a 304 without rendering
+        key = report_key(eval_data, renderer)
+        headers = {"ETag": etag_for(key), "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+        # Rendered in memory on the threadpool: no shared temp file, no blocking the event loop
+        pdf_bytes = await run_in_threadpool(get_report, eval_data, renderer, key)
+        headers["Content-Disposition"] = 'attachment; filename="AI_Developer_Scorecard.pdf"'
+        return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
     except Exception as e:
         return {"status": "error", "message": f"Could not generate PDF: {str(e)}"}
 
 # --- DSA INTERVIEW ENDPOINTS ---
-@app.post("/api/dsa-question")
+@app.post("/api/dsa-question", dependencies=[rate_limit("dsa-question")])
 async def api_dsa_question(resume: UploadFile = File(...)):
     try:
         if resume.content_type != "application/pdf":
             return {"status": "error", "message": "Please upload a valid PDF."}
 
-        text = ""
-        with pdfplumber.open(resume.file) as pdf:
-            for page in pdf.pages:
-                extracted = page.extract_text()
-                if extracted:
-                    text += extracted + "\n"
+        text = (await read_resume(resume))["raw_text"]
         
-        result = generate_dsa_question(text)
+        result = await generate_dsa_question_async(text)
         return {"status": "success", "data": result}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 # FIX: Renamed this endpoint so it doesn't fight with the master evaluation endpoint!
-@app.post("/api/dsa-evaluate") 
-@limiter.limit("10/minute")
+@app.post("/api/dsa-evaluate", dependencies=[rate_limit("dsa-evaluate")])
 async def api_dsa_evaluate(request: Request, data: DSAEvalRequest): # FIX: Uses your actual data model now
     try:
-        feedback = evaluate_dsa_answer(data.question, data.user_code)
+        feedback = await evaluate_dsa_answer_async(data.question, data.user_code)
         return {"status": "success", "feedback": feedback}
     except Exception as e:
         return {"status": "error", "message": str(e)}
     
-@app.post("/api/dsa-hint")
-def api_dsa_hint(data: DSAHintRequest):
+@app.post("/api/dsa-hint", dependencies=[rate_limit("dsa-hint")])
+async def api_dsa_hint(data: DSAHintRequest):
     try:
-        hint = get_dsa_hint(data.question)
+        hint = await get_dsa_hint_async(data.question)
         return {"status": "success", "hint": hint}
     except Exception as e:
         return {"status": "error", "message": str(e)}
\ No newline at end of file
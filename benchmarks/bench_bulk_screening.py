@@ -0,0 +1,114 @@
+"""
+Throughput of /api/screen: N distinct resumes scored against one JD, sent as
+multipart PDFs or as one ZIP, to a local uvicorn server. Reports resumes/second,
+time to the first streamed result and the process's peak RSS (server and client
+share the process).
+
+Multipart PDFs are all received before the first one is parsed (parts under 1MB
+stay in memory), so their RSS grows with the batch, up to SCREEN_MAX_REQUEST_BYTES.
+A ZIP spools to disk and is decompressed one member per parse slot.
+
+Run from the repo root:  python -m benchmarks.bench_bulk_screening [--resumes 200] [--zip]
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import resource
+import threading
+import time
+import zipfile
+
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+os.environ.setdefault("SUPABASE_KEY", "benchmark-key")
+
+import httpx
+import uvicorn
+from fpdf import FPDF
+
+import api
+
+JOB_DESCRIPTION = "Backend engineer with python fastapi docker kubernetes aws postgresql and react experience"
+SKILLS = ["python", "fastapi", "docker", "aws", "sql", "react", "java", "go", "redis", "terraform"]
+
+
+def make_pdf(i):
+    # Every resume is different, so nothing is served from the resume cache
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", "", 11)
+    skills = " ".join(SKILLS[j % len(SKILLS)] for j in range(i, i + 4))
+    pdf.multi_cell(0, 6, f"Candidate {i}. Software engineer with {skills}. " * 15)
+    return pdf.output(dest="S").encode("latin-1")
+
+
+def make_zip(pdfs):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for i, data in enumerate(pdfs):
+            archive.writestr(f"resume_{i}.pdf", data)
+    return buffer.getvalue()
+
+
+def start_server():
+    """A real uvicorn server in a thread: httpx's ASGITransport buffers the whole body, which hides streaming."""
+    server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=0, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+async def run(base_url, total, as_zip):
+    pdfs = [make_pdf(i) for i in range(total)]
+    if as_zip:
+        files = [("resumes", ("resumes.zip", make_zip(pdfs), "application/zip"))]
+    else:
+        files = [("resumes", (f"resume_{i}.pdf", data, "application/pdf")) for i, data in enumerate(pdfs)]
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        start = time.perf_counter()
+        first_result = None
+        summary = None
+        candidates = 0
+        async with client.stream("POST", "/api/screen", data={"job_description": JOB_DESCRIPTION}, files=files) as response:
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                row = json.loads(line)
+                if row["type"] == "candidate":
+                    candidates += 1
+                    first_result = first_result or time.perf_counter() - start
+                    assert row["status"] == "success", row
+                elif row["type"] == "summary":
+                    summary = row
+                else:
+                    raise RuntimeError(row)
+        elapsed = time.perf_counter() - start
+
+    assert candidates == total and summary["succeeded"] == total, summary
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{total} resumes ({'zip' if as_zip else 'multipart'}): {elapsed:.2f}s total, "
+          f"{total / elapsed:.1f} resumes/s, first result after {first_result * 1000:.0f}ms, "
+          f"peak RSS {peak_rss_mb:.0f}MB")
+    print(f"top candidate: {summary['ranking'][0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resumes", type=int, default=200)
+    parser.add_argument("--zip", action="store_true", help="upload one ZIP instead of many PDFs")
+    args = parser.parse_args()
+    server, thread, base_url = start_server()
+    try:
+        asyncio.run(run(base_url, args.resumes, args.zip))
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+if __name__ == "__main__":
+    main()
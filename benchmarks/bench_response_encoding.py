@@ -0,0 +1,126 @@
+"""
+Bytes on the wire and serialization CPU per endpoint, for the old default
+(Starlette's JSONResponse, stdlib json) against utils/response_encoding
+(orjson, plus gzip / brotli / MessagePack where installed).
+
+Payloads are shaped like real responses: an evaluate-candidate result with
+repo stats and a long AI scorecard, and full pages of history and Kanban rows.
+
+Run from the repo root:  python -m benchmarks.bench_response_encoding
+"""
+import gzip
+import json
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from utils.response_encoding import GZIP_LEVEL, _brotli, _msgpack, compress, dumps
+
+SCORECARD = (
+    "Strengths: consistent Python and TypeScript work across 40 repositories, with tests and CI on the "
+    "larger projects. Weaknesses: little documentation, few merged contributions outside their own repos. "
+) * 12
+
+
+def evaluate_candidate():
+    return {
+        "status": "success",
+        "candidate_evaluation": {
+            "resume_metrics": {
+                "ats_score": 72,
+                "semantic_score": 48,
+                "matched_skills": ["python", "docker", "aws", "sql", "react", "git"],
+                "missing_skills": ["kubernetes", "terraform", "go"],
+            },
+            "github_metrics": {
+                "public_repos": 42,
+                "total_stars": 1310,
+                "total_forks": 211,
+                "top_languages": {"Python": 18, "TypeScript": 9, "Go": 4, "Shell": 3, "Rust": 2},
+                "ai_scorecard": SCORECARD,
+            },
+        },
+    }
+
+
+def history_page(rows=100):
+    return {
+        "status": "success",
+        "data": [
+            {
+                "id": f"5b0c9a7e-1f2d-4c3b-9a8e-{i:012d}",
+                "created_at": f"2026-09-{1 + i % 28:02d}T10:{i % 60:02d}:00.000000+00:00",
+                "user_email": "candidate@example.com",
+                "match_score": 40 + i % 50,
+                "semantic_score": 20 + i % 60,
+                "missing_skills": ["kubernetes", "terraform", "graphql"][: 1 + i % 3],
+            }
+            for i in range(rows)
+        ],
+        "next_cursor": "WyIyMDI2LTA5LTAxVDEwOjAwOjAwKzAwOjAwIiwiNWIwYyJd",
+    }
+
+
+def applications_page(rows=100):
+    statuses = ["Saved", "Applied", "Interviewing", "Offer", "Rejected"]
+    return {
+        "status": "success",
+        "data": [
+            {
+                "id": f"9e6f3b1a-7c2d-4e5f-8a9b-{i:012d}",
+                "created_at": f"2026-08-{1 + i % 28:02d}T09:{i % 60:02d}:00.000000+00:00",
+                "user_id": "3f1d2c4b-5a6e-4f7a-8b9c-0d1e2f3a4b5c",
+                "company_name": f"Company {i}",
+                "job_title": "Senior Backend Engineer",
+                "match_score": 55.5 + i % 40,
+                "status": statuses[i % len(statuses)],
+            }
+            for i in range(rows)
+        ],
+        "next_cursor": None,
+    }
+
+
+def per_call_us(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    payloads = {
+        "/api/evaluate-candidate": evaluate_candidate(),
+        "/api/history/{email} (100 rows)": history_page(),
+        "/api/applications (100 rows)": applications_page(),
+    }
+    brotli, msgpack = _brotli(), _msgpack()
+    stdlib = JSONResponse(content=None)
+
+    for endpoint, payload in payloads.items():
+        # FastAPI runs jsonable_encoder before the response class either way; time only the render step
+        content = jsonable_encoder(payload)
+        old_body = stdlib.render(content)
+        new_body = dumps(content)
+        assert json.loads(old_body) == json.loads(new_body), endpoint
+
+        number = 2000
+        old_us = per_call_us(lambda: stdlib.render(content), number)
+        new_us = per_call_us(lambda: dumps(content), number)
+        gzip_us = per_call_us(lambda: gzip.compress(new_body, compresslevel=GZIP_LEVEL), 200)
+
+        print(endpoint)
+        print(f"  serialize: stdlib json {old_us:7.1f} us   orjson {new_us:7.1f} us   ({old_us / new_us:.1f}x)")
+        print(f"  bytes:     json {len(new_body):6d}   gzip {len(compress(new_body, 'gzip')):6d} (+{gzip_us:.0f} us)", end="")
+        if brotli is not None:
+            br_us = per_call_us(lambda: compress(new_body, "br"), 200)
+            print(f"   br {len(compress(new_body, 'br')):6d} (+{br_us:.0f} us)", end="")
+        if msgpack is not None:
+            print(f"   msgpack {len(msgpack.packb(content, use_bin_type=True)):6d}", end="")
+        print()
+
+    missing = [name for name, module in (("brotli", brotli), ("msgpack", msgpack)) if module is None]
+    if missing:
+        print(f"(not installed, skipped: {', '.join(missing)})")
+
+
+if __name__ == "__main__":
+    main()
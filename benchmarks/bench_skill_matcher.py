@@ -0,0 +1,89 @@
+"""
+Benchmarks the compiled skill matcher against the old per-keyword scan.
+
+Run from the repo root:  python -m benchmarks.bench_skill_matcher
+"""
+import random
+import time
+
+from utils.ats_matcher import SKILL_KEYWORDS, SKILL_SYNONYMS, extract_skills_from_text, normalize_skills
+
+
+def legacy_extract_skills_from_text(text):
+    """The original O(keywords x text) implementation, kept as the reference."""
+    text = text.lower()
+    found_skills = set()
+    for skill in SKILL_KEYWORDS:
+        if f" {skill} " in f" {text} ":
+            found_skills.add(skill)
+    for main, aliases in SKILL_SYNONYMS.items():
+        for alias in aliases:
+            if f" {alias} " in f" {text} ":
+                found_skills.add(main)
+    return found_skills
+
+
+def legacy_normalize_skills(skills):
+    normalized = set()
+    for skill in skills:
+        skill = skill.lower().strip()
+        mapped = False
+        for main_skill, aliases in SKILL_SYNONYMS.items():
+            if skill == main_skill or skill in aliases:
+                normalized.add(main_skill)
+                mapped = True
+                break
+        if not mapped:
+            normalized.add(skill)
+    return normalized
+
+
+FILLER = (
+    "designed implemented and shipped production services for a team of engineers "
+    "improved latency by 40 percent and mentored interns on code review practices"
+).split()
+PHRASES = SKILL_KEYWORDS + [a for aliases in SKILL_SYNONYMS.values() for a in aliases] + ["google", "golang", "reactjs,", "C++"]
+
+
+def make_resume(pages, seed=0):
+    """Roughly 500 words per page, with skills, aliases and near-misses mixed in."""
+    rng = random.Random(seed)
+    words = []
+    for _ in range(pages * 500):
+        words.append(rng.choice(PHRASES) if rng.random() < 0.08 else rng.choice(FILLER))
+        # Real resumes have newlines and ragged spacing; keep them in the mix
+        words.append(rng.choice([" ", " ", " ", "\n", "  "]))
+    return "".join(words)
+
+
+def bench(fn, text, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(text)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    # Exact-equivalence check before any timing
+    for seed in range(200):
+        text = make_resume(1, seed)
+        assert extract_skills_from_text(text) == legacy_extract_skills_from_text(text), seed
+    probe = set(PHRASES) | set(SKILL_SYNONYMS) | {" ReactJS ", "Unknown"}
+    assert normalize_skills(probe) == legacy_normalize_skills(probe)
+
+    for pages in (1, 20):
+        text = make_resume(pages)
+        repeat = 200 if pages == 1 else 20
+        old_ms = bench(legacy_extract_skills_from_text, text, repeat)
+        new_ms = bench(extract_skills_from_text, text, repeat)
+        print(f"{pages:>2}-page resume ({len(text):>7} chars): "
+              f"legacy {old_ms:8.3f} ms | compiled {new_ms:8.3f} ms | {old_ms / new_ms:5.1f}x")
+
+    skills = list(probe) * 50
+    old_ms = bench(legacy_normalize_skills, skills, 50)
+    new_ms = bench(normalize_skills, skills, 50)
+    print(f"normalize_skills ({len(skills)} skills): legacy {old_ms:.3f} ms | indexed {new_ms:.3f} ms | {old_ms / new_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
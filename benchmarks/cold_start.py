@@ -0,0 +1,96 @@
+"""
+Cold-start benchmark for the Vercel deployment.
+
+Imports `api` in fresh interpreters with `-X importtime`, prints the slowest
+modules, and exits non-zero if startup gets slower than the budget or if a
+heavy dependency is pulled in at boot.
+
+Run from the repo root:  python -m benchmarks.cold_start [--budget-ms 900] [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# These must only load when the feature that needs them is first used
+DEFERRED_MODULES = [
+    "pdfplumber", "pdfminer", "google.genai", "supabase", "fpdf", "reportlab",
+    "requests", "httpx", "numpy", "scipy", "streamlit", "plotly", "pandas",
+]
+
+PROBE = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import api\n"
+    "print(round((time.perf_counter() - start) * 1000, 1))\n"
+    "print(','.join(m for m in {modules!r} if m in sys.modules))\n"
+).format(modules=DEFERRED_MODULES)
+
+
+def child_env():
+    env = dict(os.environ)
+    # Dummy settings: importing must not need (or contact) the real services
+    env.setdefault("SUPABASE_URL", "https://example.supabase.co")
+    env.setdefault("SUPABASE_KEY", "cold-start-benchmark")
+    env.setdefault("GOOGLE_API_KEY", "cold-start-benchmark")
+    return env
+
+
+def import_profile():
+    """One `-X importtime` run: (cumulative_us, self_us, module) for every import."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import api"],
+        capture_output=True, text=True, env=child_env(), check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), module.strip()))
+    return rows
+
+
+def timed_import():
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], capture_output=True, text=True, env=child_env(), check=True,
+    )
+    elapsed_ms, loaded = result.stdout.splitlines()[-2:]
+    return float(elapsed_ms), [m for m in loaded.split(",") if m]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("COLD_START_BUDGET_MS", "900")))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    rows = import_profile()
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, module in sorted(rows, reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {module}")
+
+    timings = []
+    loaded = []
+    for _ in range(args.runs):
+        elapsed_ms, loaded = timed_import()
+        timings.append(elapsed_ms)
+    median_ms = statistics.median(timings)
+    print(f"\nimport api: median {median_ms:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: deferred modules imported at boot: {', '.join(loaded)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"FAIL: cold start {median_ms:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Load test: concurrent /api/evaluate-candidate calls against slow fake upstreams.
+
+GitHub, Gemini and Supabase are replaced by in-process fakes that just wait,
+so the numbers show how much of that waiting one worker can overlap.
+`--blocking` swaps in the old behaviour (blocking calls on the event loop)
+for comparison.
+
+Run from the repo root:  python -m benchmarks.load_slow_upstreams [--blocking]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+os.environ.setdefault("SUPABASE_KEY", "benchmark-key")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-key")
+
+import httpx
+from fpdf import FPDF
+
+import api
+import utils.http_client
+import utils.github_scanner
+import utils.llm_gateway
+
+GITHUB_DELAY = 0.3
+GEMINI_DELAY = 1.0
+DB_DELAY = 0.1
+
+
+def make_pdf():
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", "", 12)
+    pdf.multi_cell(0, 6, "Backend engineer. python fastapi docker aws sql react " * 20)
+    return pdf.output(dest="S").encode("latin-1")
+
+
+async def fake_upstreams(request):
+    # Supabase's PostgREST and GitHub both go through the shared httpx client
+    if "supabase" in request.url.host:
+        await asyncio.sleep(DB_DELAY)
+        return httpx.Response(201, json=[])
+    await asyncio.sleep(GITHUB_DELAY)
+    return httpx.Response(200, json=[{"name": "repo", "stargazers_count": 3, "forks_count": 1, "language": "Python"}])
+
+
+class FakeGemini:
+    """Stands in for the gateway's genai.Client: sync and aio generate_content both just wait."""
+
+    def __init__(self):
+        outer = self
+
+        class Models:
+            def generate_content(self, **kwargs):
+                time.sleep(GEMINI_DELAY)
+                return outer
+
+        class AsyncModels:
+            async def generate_content(self, **kwargs):
+                await asyncio.sleep(GEMINI_DELAY)
+                return outer
+
+        self.models = Models()
+        self.aio = type("Aio", (), {"models": AsyncModels()})()
+        self.text = "A strong backend developer."
+
+
+def install_fakes(blocking):
+    api.rate_limiter.enabled = False
+    utils.llm_gateway._client = FakeGemini()
+    utils.http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(fake_upstreams))
+
+    if blocking:
+        # What the handlers used to do: block the loop for every upstream call
+        async def blocking_github(username):
+            time.sleep(GITHUB_DELAY)
+            return utils.github_scanner._summarize_repos([{"name": "repo", "stargazers_count": 3}])
+
+        async def blocking_scorecard(stats):
+            return utils.github_scanner.generate_dev_scorecard(stats)
+
+        async def blocking_save(db_record):
+            time.sleep(DB_DELAY)
+
+        api.analyze_github_profile_async = blocking_github
+        api.generate_dev_scorecard_async = blocking_scorecard
+        api.save_evaluation = blocking_save
+
+
+async def run(total, concurrency):
+    pdf_bytes = make_pdf()
+    transport = httpx.ASGITransport(app=api.app)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(i):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/api/evaluate-candidate",
+                    data={"github_username": f"user{i}", "job_description": "python aws kubernetes"},
+                    files={"resume": ("resume.pdf", pdf_bytes, "application/pdf")},
+                )
+                assert response.json()["status"] == "success", response.text
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"{total} requests, concurrency {concurrency}: {elapsed:.2f}s total, "
+          f"{total / elapsed:.2f} req/s, p50 {statistics.median(latencies):.2f}s, "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=25)
+    parser.add_argument("--blocking", action="store_true", help="simulate the old blocking upstream calls")
+    args = parser.parse_args()
+
+    install_fakes(args.blocking)
+    print(f"upstream delays: github {GITHUB_DELAY}s, gemini {GEMINI_DELAY}s, db {DB_DELAY}s"
+          f"{' (blocking on the event loop)' if args.blocking else ''}")
+    asyncio.run(run(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
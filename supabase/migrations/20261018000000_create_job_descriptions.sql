@@ -0,0 +1,10 @@
+-- Registered job descriptions (POST /api/job-descriptions), so any worker can rebuild a
+-- profile by jd_id. The API upserts on id, so id must be the primary key.
+create table if not exists public.job_descriptions (
+    id text primary key,  -- jd_id: SHA-256 of the normalized JD text
+    job_description text not null,
+    created_at timestamptz not null default now()
+);
+
+-- The API reads and writes this table with SUPABASE_KEY. If you enable row level security here,
+-- that key has to be the service-role key (or add policies allowing its select/insert/update).
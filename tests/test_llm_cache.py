@@ -0,0 +1,46 @@
+import asyncio
+import threading
+
+import pytest
+
+from utils.llm_cache import LLMResponseCache
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "llm_cache.sqlite3")
+
+
+def test_disk_tier_is_shared_across_caches(db_path):
+    LLMResponseCache(1024 * 1024, 60, db_path).set("k", "a plan")
+    other_worker = LLMResponseCache(1024 * 1024, 60, db_path)
+
+    assert other_worker.get("study-plan", "k") == "a plan"
+    assert other_worker.get("study-plan", "k") == "a plan"
+    assert other_worker.stats()["endpoints"]["study-plan"] == {"memory_hits": 1, "disk_hits": 1, "misses": 0, "hit_ratio": 1.0}
+
+
+def test_async_calls_use_the_disk_tier_off_the_event_loop(db_path, monkeypatch):
+    cache = LLMResponseCache(1024 * 1024, 60, db_path)
+    disk_threads = []
+    read, write = cache._disk.get, cache._disk.set
+    monkeypatch.setattr(cache._disk, "get", lambda *args: disk_threads.append(threading.current_thread().name) or read(*args))
+    monkeypatch.setattr(cache._disk, "set", lambda *args: disk_threads.append(threading.current_thread().name) or write(*args))
+
+    async def scenario():
+        await cache.aset("k", "a hint")
+        cache._memory.delete("k")
+        return await cache.aget("dsa-hint", "k"), await cache.aget("dsa-hint", "missing")
+
+    assert asyncio.run(scenario()) == ("a hint", None)
+    assert len(disk_threads) == 3
+    assert all(name.startswith("llm-cache") for name in disk_threads)
+
+
+@pytest.mark.parametrize("empty", [None, ""])
+def test_empty_answers_are_not_cached(db_path, empty):
+    cache = LLMResponseCache(1024 * 1024, 60, db_path)
+
+    cache.set("k", empty)
+    asyncio.run(cache.aset("k", empty))
+    assert cache.get("dsa-hint", "k") is None
@@ -0,0 +1,108 @@
+import asyncio
+import contextlib
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils import llm_gateway
+from utils.llm_gateway import _Slots
+
+
+class FakeGemini:
+    """Stands in for genai.Client: sync and aio calls wait a little and track how many overlap."""
+
+    def __init__(self, delay=0.05, failures=0):
+        self.delay = delay
+        self.failures = failures
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        outer = self
+
+        class Models:
+            def generate_content(self, **kwargs):
+                with outer._call():
+                    time.sleep(outer.delay)
+                return outer._answer()
+
+        class AsyncModels:
+            async def generate_content(self, **kwargs):
+                with outer._call():
+                    await asyncio.sleep(outer.delay)
+                return outer._answer()
+
+        self.models = Models()
+        self.aio = SimpleNamespace(models=AsyncModels())
+
+    @contextlib.contextmanager
+    def _call(self):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _answer(self):
+        with self._lock:
+            if self.failures:
+                self.failures -= 1
+                raise TimeoutError("gemini timed out")
+        return SimpleNamespace(text="ok")
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    def install(**kwargs):
+        fake = FakeGemini(**kwargs)
+        monkeypatch.setattr(llm_gateway, "_client", fake)
+        monkeypatch.setattr(llm_gateway, "slots", _Slots(2))
+        return fake
+    return install
+
+
+def test_sync_and_async_calls_share_one_limit(gemini):
+    fake = gemini()
+
+    async def scenario():
+        threads = [asyncio.to_thread(llm_gateway.generate, "hi") for _ in range(4)]
+        tasks = [llm_gateway.agenerate("hi") for _ in range(4)]
+        return await asyncio.gather(*threads, *tasks)
+
+    assert asyncio.run(scenario()) == ["ok"] * 8
+    assert fake.peak == 2
+    assert llm_gateway.slots.snapshot() == {"limit": 2, "in_flight": 0, "waiting": 0}
+
+
+def test_a_slot_is_free_while_its_call_backs_off(gemini, monkeypatch):
+    fake = gemini(failures=1)
+    monkeypatch.setattr(llm_gateway, "_backoff", lambda attempt: 0.3)
+
+    async def scenario():
+        retrying = asyncio.create_task(llm_gateway.agenerate("first"))
+        await asyncio.sleep(0.1)  # the first call has failed and is backing off
+        assert llm_gateway.slots.snapshot()["in_flight"] == 0
+        return await asyncio.gather(retrying, llm_gateway.agenerate("second"))
+
+    assert asyncio.run(scenario()) == ["ok", "ok"]
+
+
+def test_a_cancelled_waiter_does_not_leak_its_slot():
+    slots = _Slots(1)
+
+    async def scenario():
+        await slots.__aenter__()
+        waiter = asyncio.create_task(slots.__aenter__())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        await slots.__aexit__(None, None, None)
+        async with slots:
+            return slots.snapshot()
+
+    assert asyncio.run(scenario()) == {"limit": 1, "in_flight": 1, "waiting": 0}
+    assert slots.snapshot()["in_flight"] == 0
@@ -0,0 +1,42 @@
+import base64
+import json
+
+import pytest
+
+from utils.pagination import decode_cursor, encode_cursor
+
+
+def make_cursor(created_at, row_id):
+    return base64.urlsafe_b64encode(json.dumps([created_at, row_id]).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def test_cursor_round_trip():
+    row = {"created_at": "2026-10-18T19:40:14.187861+00:00", "id": "b771c65e-ee2e-485f-9623-b83c3cae7373"}
+    assert decode_cursor(encode_cursor(row)) == (row["created_at"], row["id"])
+
+
+def test_integer_ids_are_accepted():
+    assert decode_cursor(make_cursor("2026-10-18T19:40:14+00:00", 42)) == ("2026-10-18T19:40:14+00:00", "42")
+
+
+def test_no_cursor_means_the_first_page():
+    assert decode_cursor(None) is None
+    assert decode_cursor("") is None
+
+
+@pytest.mark.parametrize("created_at, row_id", [
+    # Would close the quoted value and add conditions to the PostgREST or=(...) filter
+    ('2026-10-18T00:00:00+00:00",id.gt."0', "b771c65e-ee2e-485f-9623-b83c3cae7373"),
+    ("2026-10-18T00:00:00+00:00", '0"),or(id.not.is.null'),
+    ("yesterday", "b771c65e-ee2e-485f-9623-b83c3cae7373"),
+    ("2026-10-18T00:00:00+00:00", "not-a-uuid"),
+    ("2026-10-18T00:00:00+00:00", None),
+])
+def test_tampered_cursors_are_rejected(created_at, row_id):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(make_cursor(created_at, row_id))
+
+
+def test_garbage_is_rejected():
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor("not base64 at all!")
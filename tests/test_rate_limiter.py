@@ -0,0 +1,180 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+from starlette.requests import Request
+
+import api
+from utils import rate_limiter as limiter_module
+from utils import token_auth
+from utils.cache import LRUCache
+from utils.rate_limiter import RateLimiter, SQLiteBuckets
+
+SECRET = "test-secret-with-at-least-32-bytes!!"
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(limiter_module.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def buckets(tmp_path):
+    return SQLiteBuckets(str(tmp_path / "ratelimit.db"))
+
+
+def take(backend, key, cost, capacity=100.0, rate=10.0):
+    return asyncio.run(backend.take(key, cost, capacity, rate))
+
+
+def test_new_bucket_starts_full_and_is_drawn_down(buckets, clock):
+    assert take(buckets, "ip:1", 60) == (True, 0.0)
+    assert take(buckets, "ip:1", 40) == (True, 0.0)
+    allowed, retry_after = take(buckets, "ip:1", 30)
+    assert not allowed
+    assert retry_after == pytest.approx(3.0)  # 30 tokens short at 10 tokens/s
+
+
+def test_bucket_refills_at_the_rate_but_never_past_capacity(buckets, clock):
+    take(buckets, "ip:1", 100)
+    clock.now += 2
+    assert take(buckets, "ip:1", 20) == (True, 0.0)
+    assert take(buckets, "ip:1", 1)[0] is False
+
+    clock.now += 3600
+    assert take(buckets, "ip:1", 100) == (True, 0.0)
+    assert take(buckets, "ip:1", 1)[0] is False
+
+
+def test_a_rejected_take_charges_nothing(buckets, clock):
+    take(buckets, "ip:1", 90)
+    assert take(buckets, "ip:1", 50)[0] is False
+    assert take(buckets, "ip:1", 10) == (True, 0.0)
+
+
+def test_buckets_are_per_key(buckets, clock):
+    take(buckets, "ip:1", 100)
+    assert take(buckets, "ip:2", 100) == (True, 0.0)
+
+
+class FailingBackend:
+    async def take(self, key, cost, capacity, rate):
+        raise ConnectionError("redis is down")
+
+
+class RecordingBackend:
+    def __init__(self):
+        self.costs = []
+
+    async def take(self, key, cost, capacity, rate):
+        self.costs.append(cost)
+        return True, 0.0
+
+
+def test_limiter_charges_at_most_a_full_bucket():
+    backend = RecordingBackend()
+    limiter = RateLimiter(backend, tokens_per_minute=600, burst_tokens=1000)
+
+    assert asyncio.run(limiter.take("ip:1", "rewrite", 5000)) == (True, 0.0)
+    assert backend.costs == [1000]
+    assert limiter.stats()["endpoints"]["rewrite"]["tokens_charged"] == 1000
+
+
+def test_limiter_lets_requests_through_when_the_backend_fails():
+    limiter = RateLimiter(FailingBackend(), tokens_per_minute=600, burst_tokens=1000)
+
+    assert asyncio.run(limiter.take("ip:1", "rewrite", 300)) == (True, 0.0)
+    assert limiter.stats()["endpoints"]["rewrite"]["backend_errors"] == 1
+
+
+@pytest.fixture
+def auth(monkeypatch):
+    """Remote mode with an empty token cache, and a Supabase that fails the test if it is asked."""
+    monkeypatch.setattr(token_auth, "SUPABASE_JWT_SECRET", None)
+    monkeypatch.setattr(token_auth, "SUPABASE_JWKS_URL", None)
+    monkeypatch.setattr(token_auth, "_jwks_client", None)
+    monkeypatch.setattr(token_auth, "verified_tokens", LRUCache(1024 * 1024, 300, lambda entry: 512))
+
+    async def no_remote_calls(token):
+        raise AssertionError("the rate limiter called Supabase")
+
+    monkeypatch.setattr(api, "fetch_supabase_user", no_remote_calls)
+
+
+async def supabase_says_user_1(token):
+    return SimpleNamespace(user=SimpleNamespace(id="user-1", email="a@example.com", role="authenticated"))
+
+
+def make_request(token):
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return Request({"type": "http", "method": "POST", "path": "/api/rewrite", "headers": headers, "client": ("203.0.113.7", 5000)})
+
+
+def make_token(**claims):
+    payload = {"sub": "user-1", "aud": "authenticated", "exp": int(time.time()) + 600, **claims}
+    return jwt.encode(payload, SECRET, algorithm="HS256")
+
+
+def test_garbage_tokens_are_limited_per_ip_without_calling_out(auth):
+    for i in range(30):
+        assert api.rate_limit_key(make_request(f"garbage{i}")) == "ip:203.0.113.7"
+    assert token_auth.verified_tokens.stats()["entries"] == 0
+
+
+def test_unverified_tokens_are_limited_per_ip_in_remote_mode(auth):
+    # Well formed, but only Supabase could vouch for it
+    assert api.rate_limit_key(make_request(make_token())) == "ip:203.0.113.7"
+
+
+def test_already_verified_tokens_are_limited_per_user(auth):
+    token = make_token()
+    asyncio.run(token_auth.verify_token(token, supabase_says_user_1))
+    assert api.rate_limit_key(make_request(token)) == "user:user-1"
+
+
+def test_tokens_signed_with_the_secret_are_limited_per_user(auth, monkeypatch):
+    monkeypatch.setattr(token_auth, "SUPABASE_JWT_SECRET", SECRET)
+    assert api.rate_limit_key(make_request(make_token())) == "user:user-1"
+    assert api.rate_limit_key(make_request(make_token(exp=int(time.time()) - 3600))) == "ip:203.0.113.7"
+
+
+def test_jwks_mode_never_fetches_the_jwks_for_the_limiter(auth, monkeypatch):
+    monkeypatch.setattr(token_auth, "SUPABASE_JWKS_URL", "https://example.supabase.co/auth/v1/.well-known/jwks.json")
+
+    def no_fetch():
+        raise AssertionError("the rate limiter fetched the JWKS")
+
+    monkeypatch.setattr(token_auth, "_get_jwks_client", no_fetch)
+    assert api.rate_limit_key(make_request(make_token(sub="someone"))) == "ip:203.0.113.7"
+
+
+def test_jwks_mode_uses_keys_already_fetched(auth, monkeypatch):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    client = jwt.PyJWKClient("https://example.supabase.co/auth/v1/.well-known/jwks.json")
+    client.jwk_set_cache.put({"keys": [{**RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True), "kid": "key-1"}]})
+    monkeypatch.setattr(token_auth, "SUPABASE_JWKS_URL", client.uri)
+    monkeypatch.setattr(token_auth, "_jwks_client", client)
+
+    payload = {"sub": "user-1", "aud": "authenticated", "exp": int(time.time()) + 600}
+    signed = jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": "key-1"})
+    unknown_kid = jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": "key-2"})
+    assert api.rate_limit_key(make_request(signed)) == "user:user-1"
+    assert api.rate_limit_key(make_request(unknown_kid)) == "ip:203.0.113.7"
+
+
+def test_missing_token_is_limited_per_ip(auth):
+    assert api.rate_limit_key(make_request(None)) == "ip:203.0.113.7"
@@ -0,0 +1,28 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+from utils import telemetry
+
+STATS_PATHS = ["/metrics", "/api/cache-stats", "/api/llm-stats", "/api/db-stats", "/api/rate-limit-stats", "/api/pdf-stats"]
+
+
+@pytest.fixture
+def client():
+    return TestClient(api.app)
+
+
+@pytest.mark.parametrize("path", STATS_PATHS)
+def test_stats_are_not_served_while_metrics_are_disabled(client, monkeypatch, path):
+    monkeypatch.setattr(telemetry, "enabled", False)
+    assert client.get(path).status_code == 404
+
+
+@pytest.mark.parametrize("path", STATS_PATHS)
+def test_stats_need_the_metrics_token_when_one_is_set(client, monkeypatch, path):
+    monkeypatch.setattr(telemetry, "enabled", True)
+    monkeypatch.setattr(telemetry, "METRICS_TOKEN", "scrape-secret")
+
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get(path, headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
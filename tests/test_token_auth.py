@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+import importlib.util
+import time
+from types import SimpleNamespace
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from utils import token_auth
+from utils.cache import LRUCache
+
+SECRET = "test-secret-with-at-least-32-bytes!!"
+
+
+@pytest.fixture(autouse=True)
+def clean_auth(monkeypatch):
+    """Every test starts in remote mode with an empty token cache."""
+    monkeypatch.setattr(token_auth, "SUPABASE_JWT_SECRET", None)
+    monkeypatch.setattr(token_auth, "SUPABASE_JWKS_URL", None)
+    monkeypatch.setattr(token_auth, "AUTH_REMOTE_RECHECK_SECONDS", 0)
+    monkeypatch.setattr(token_auth, "AUTH_CACHE_TTL_SECONDS", 300)
+    monkeypatch.setattr(token_auth, "verified_tokens", LRUCache(1024 * 1024, 300, lambda entry: 512))
+
+
+def make_token(key=SECRET, algorithm="HS256", expires_in=600, **claims):
+    payload = {"sub": "user-1", "email": "a@example.com", "aud": "authenticated", "exp": int(time.time()) + expires_in}
+    payload.update(claims)
+    return jwt.encode(payload, key, algorithm=algorithm)
+
+
+class FakeSupabase:
+    """Stands in for fetch_user: counts calls and answers like supabase.auth.get_user."""
+
+    def __init__(self, user_id="user-1", fail=False):
+        self.calls = 0
+        self.user_id = user_id
+        self.fail = fail
+
+    async def __call__(self, token):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("invalid JWT")
+        return SimpleNamespace(user=SimpleNamespace(id=self.user_id, email="a@example.com", role="authenticated"))
+
+
+class FakeJWKS:
+    def __init__(self, public_key=None, error=None):
+        self.public_key = public_key
+        self.error = error
+
+    def get_signing_key_from_jwt(self, token):
+        if self.error:
+            raise self.error
+        return SimpleNamespace(key=self.public_key)
+
+
+def verify(token, fetch_user):
+    return asyncio.run(token_auth.verify_token(token, fetch_user))
+
+
+def cached_seconds_left(token):
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    return token_auth.verified_tokens._entries[key][2] - time.monotonic()
+
+
+def test_secret_mode_verifies_locally_and_caches(monkeypatch):
+    monkeypatch.setattr(token_auth, "SUPABASE_JWT_SECRET", SECRET)
+    supabase = FakeSupabase()
+    token = make_token()
+
+    assert verify(token, supabase).id == "user-1"
+    assert verify(token, supabase).email == "a@example.com"
+    assert supabase.calls == 0
+    assert token_auth.verified_tokens.hits == 1
+
+
+def test_secret_mode_rejects_a_bad_signature(monkeypatch):
+    monkeypatch.setattr(token_auth, "SUPABASE_JWT_SECRET", SECRET)
+    with pytest.raises(token_auth.InvalidToken):
+        verify(make_token(key="some-other-secret-of-at-least-32-bytes"), FakeSupabase())
+
+
+def test_expired_token_is_rejected(monkeypatch):
+    monkeypatch.setattr(token_auth, "SUPABASE_JWT_SECRET", SECRET)
+    with pytest.raises(token_auth.InvalidToken, match="expired"):
+        verify(make_token(expires_in=-token_auth.JWT_LEEWAY_SECONDS - 60), FakeSupabase())
+
+
+def test_wrong_audience_is_rejected(monkeypatch):
+    monkeypatch.setattr(token_auth, "SUPABASE_JWT_SECRET", SECRET)
+    with pytest.raises(token_auth.InvalidToken, match="[Aa]udience"):
+        verify(make_token(aud="someone-else"), FakeSupabase())
+
+
+def test_jwks_mode_verifies_asymmetric_tokens(monkeypatch):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    monkeypatch.setattr(token_auth, "SUPABASE_JWKS_URL", "https://example.supabase.co/auth/v1/.well-known/jwks.json")
+    monkeypatch.setattr(token_auth, "_get_jwks_client", lambda: FakeJWKS(private_key.public_key()))
+    supabase = FakeSupabase()
+
+    assert verify(make_token(key=private_key, algorithm="RS256"), supabase).id == "user-1"
+    assert supabase.calls == 0
+
+
+def test_jwks_without_the_tokens_key_falls_back_to_supabase(monkeypatch):
+    # A project still signing with the legacy HS256 secret publishes no matching key
+    monkeypatch.setattr(token_auth, "SUPABASE_JWKS_URL", "https://example.supabase.co/auth/v1/.well-known/jwks.json")
+    monkeypatch.setattr(token_auth, "_get_jwks_client", lambda: FakeJWKS(error=jwt.PyJWKClientError("Unable to find a signing key")))
+    supabase = FakeSupabase()
+
+    assert verify(make_token(), supabase).id == "user-1"
+    assert supabase.calls == 1
+
+
+def test_unreachable_jwks_is_not_an_invalid_token(monkeypatch):
+    monkeypatch.setattr(token_auth, "SUPABASE_JWKS_URL", "https://example.supabase.co/auth/v1/.well-known/jwks.json")
+    monkeypatch.setattr(token_auth, "_get_jwks_client", lambda: FakeJWKS(error=jwt.PyJWKClientConnectionError("timed out")))
+
+    with pytest.raises(token_auth.AuthUnavailable):
+        verify(make_token(), FakeSupabase())
+
+
+def test_supabase_url_alone_means_remote_mode(monkeypatch):
+    # The app always sets SUPABASE_URL; that must not switch JWKS verification on by itself
+    monkeypatch.setenv("SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.delenv("SUPABASE_JWKS_URL", raising=False)
+    monkeypatch.delenv("SUPABASE_JWT_SECRET", raising=False)
+    spec = importlib.util.spec_from_file_location("token_auth_from_env", token_auth.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    assert module.verification_mode() == "remote"
+
+
+def test_remote_mode_asks_supabase_once_and_caches():
+    supabase = FakeSupabase()
+    token = make_token()
+
+    assert verify(token, supabase).id == "user-1"
+    assert verify(token, supabase).id == "user-1"
+    assert supabase.calls == 1
+
+
+def test_remote_mode_cache_never_outlives_the_token():
+    token = make_token(expires_in=60)
+    verify(token, FakeSupabase())
+    assert cached_seconds_left(token) <= 60
+
+
+def test_remote_mode_does_not_cache_an_already_expired_token():
+    supabase = FakeSupabase()
+    token = make_token(expires_in=-5)
+
+    verify(token, supabase)
+    verify(token, supabase)
+    assert supabase.calls == 2
+
+
+def test_remote_mode_rejects_what_supabase_rejects():
+    with pytest.raises(token_auth.InvalidToken):
+        verify(make_token(), FakeSupabase(fail=True))
+
+
+def test_missing_token_is_rejected():
+    with pytest.raises(token_auth.InvalidToken):
+        verify("", FakeSupabase())
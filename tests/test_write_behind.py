@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+from utils import write_behind
+from utils.write_behind import WriteBehindBuffer
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(write_behind, "WRITE_BEHIND_RETRY_BASE_SECONDS", 0)
+
+
+class FakeTable:
+    """Stands in for a repository's add_many: records batches, can fail the first few, or hang."""
+
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+        self.hang = False
+        self.started = None
+
+    async def add_many(self, rows):
+        if self.started is not None:
+            self.started.set()
+        if self.hang:
+            await asyncio.Event().wait()
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("supabase is down")
+        self.batches.append(list(rows))
+
+
+def test_rows_are_written_in_batches():
+    table = FakeTable()
+    buffer = WriteBehindBuffer("test", table.add_many, batch_size=3, flush_ms=60_000)
+
+    async def scenario():
+        for i in range(7):
+            assert buffer.add({"n": i})
+        await buffer.close()
+
+    asyncio.run(scenario())
+    assert [len(batch) for batch in table.batches] == [3, 3, 1]
+    assert [row["n"] for batch in table.batches for row in batch] == list(range(7))
+    assert buffer.stats()["written"] == 7
+    assert buffer.stats()["batches"] == 3
+
+
+def test_a_partial_batch_is_written_after_the_flush_interval():
+    table = FakeTable()
+    buffer = WriteBehindBuffer("test", table.add_many, batch_size=50, flush_ms=10)
+
+    async def scenario():
+        buffer.add({"n": 1})
+        await asyncio.sleep(0.1)
+        assert table.batches == [[{"n": 1}]]
+        await buffer.close()
+
+    asyncio.run(scenario())
+
+
+def test_failed_batches_are_retried():
+    table = FakeTable(failures=2)
+    buffer = WriteBehindBuffer("test", table.add_many, batch_size=10, max_retries=3)
+
+    async def scenario():
+        buffer.add({"n": 1})
+        await buffer.close()
+
+    asyncio.run(scenario())
+    stats = buffer.stats()
+    assert table.batches == [[{"n": 1}]]
+    assert (stats["retries"], stats["written"], stats["dropped"]) == (2, 1, 0)
+
+
+def test_batches_are_dropped_after_the_last_retry():
+    table = FakeTable(failures=10)
+    buffer = WriteBehindBuffer("test", table.add_many, batch_size=10, max_retries=1)
+
+    async def scenario():
+        buffer.add({"n": 1})
+        buffer.add({"n": 2})
+        await buffer.close()
+
+    asyncio.run(scenario())
+    stats = buffer.stats()
+    assert (stats["retries"], stats["failed_batches"], stats["dropped"], stats["written"]) == (1, 1, 2, 0)
+    assert stats["in_flight"] == 0
+
+
+def test_rows_past_max_buffer_are_refused():
+    table = FakeTable()
+    buffer = WriteBehindBuffer("test", table.add_many, batch_size=10, max_buffer=2)
+
+    async def scenario():
+        assert buffer.add({"n": 1})
+        assert buffer.add({"n": 2})
+        assert not buffer.add({"n": 3})
+        await buffer.close()
+
+    asyncio.run(scenario())
+    assert buffer.stats()["dropped"] == 1
+    assert buffer.stats()["written"] == 2
+
+
+def test_a_batch_abandoned_on_a_dead_loop_counts_as_dropped():
+    table = FakeTable()
+    buffer = WriteBehindBuffer("test", table.add_many, batch_size=2, flush_ms=60_000)
+
+    async def request_whose_loop_dies():
+        table.hang = True
+        table.started = asyncio.Event()
+        buffer.add({"n": 1})
+        buffer.add({"n": 2})
+        await table.started.wait()
+
+    asyncio.run(request_whose_loop_dies())
+    table.hang = False
+    table.started = None
+
+    async def next_request():
+        buffer.add({"n": 3})
+        await buffer.close()
+
+    asyncio.run(next_request())
+    stats = buffer.stats()
+    assert table.batches == [[{"n": 3}]]
+    assert (stats["written"], stats["dropped"], stats["in_flight"], stats["buffered"]) == (1, 2, 0, 0)
@@ -1,3 +1,5 @@
+from utils.telemetry import traced
+
 SKILL_SYNONYMS = {
     "nlp": ["natural language processing", "text processing"],
     "ml": ["machine learning", "predictive modeling"],
@@ -21,6 +23,15 @@ SKILL_SYNONYMS = {
     "css": ["css3", "tailwind", "bootstrap"]
 }
 
+# Reverse index: every canonical skill and alias -> canonical skill.
+# Built in SKILL_SYNONYMS order so the first entry that claims a term wins,
+# same as the old nested scan.
+_CANONICAL_SKILL = {}
+for _main, _aliases in SKILL_SYNONYMS.items():
+    _CANONICAL_SKILL.setdefault(_main, _main)
+    for _alias in _aliases:
+        _CANONICAL_SKILL.setdefault(_alias, _main)
+
 def normalize_skills(skills: set) -> set:
     """
     Standardizes skills (e.g., 'ReactJS' -> 'react') using the synonym dictionary.
@@ -28,21 +39,8 @@ def normalize_skills(skills: set) -> set:
     normalized = set()
     for skill in skills:
         skill = skill.lower().strip()
-        
-        # Check if skill is a known synonym
-        mapped = False
-        for main_skill, aliases in SKILL_SYNONYMS.items():
-            if skill == main_skill or skill in aliases:
-                normalized.add(main_skill)
-                mapped = True
-                break
-        
-        # If no synonym found, keep original if it's in our main list
-        if not mapped:
-             # Clean up common variations like "python 3" -> "python" is handled by the synonym map, 
-             # but here we just add the raw skill if it matches the keyword list logic later
-            normalized.add(skill)
-            
+        # Unknown skills are kept as-is
+        normalized.add(_CANONICAL_SKILL.get(skill, skill))
     return normalized
 
 SKILL_KEYWORDS = [
@@ -65,26 +63,58 @@ SKILL_KEYWORDS = [
     "jira", "agile", "scrum", "excel", "power bi", "tableau", "figma", "selenium", "cypress", "junit", "postman"
 ]
 
+def _build_skill_index():
+    """
+    Compiles SKILL_KEYWORDS and every synonym alias into lookup tables, once.
+    Single-word phrases go into a token -> skills dict; the handful of
+    multi-word phrases are kept with their tokens for a cheap pre-check.
+    """
+    single = {}
+    multi = {}
+
+    def add(phrase, skill):
+        if " " in phrase:
+            tokens = frozenset(phrase.split(" "))
+            multi.setdefault(phrase, (tokens, set()))[1].add(skill)
+        else:
+            single.setdefault(phrase, set()).add(skill)
+
+    for skill in SKILL_KEYWORDS:
+        add(skill, skill)
+    for main, aliases in SKILL_SYNONYMS.items():
+        for alias in aliases:
+            add(alias, main)
+
+    multi_phrases = [(phrase, tokens, skills) for phrase, (tokens, skills) in multi.items()]
+    return single, multi_phrases
+
+_SINGLE_WORD_SKILLS, _MULTI_WORD_SKILLS = _build_skill_index()
+
+@traced("skills.extract")
 def extract_skills_from_text(text: str) -> set:
     """
     Scans text for skills from our expanded SKILL_KEYWORDS list.
     """
+    # A skill only counts when it is surrounded by spaces (e.g., "go" must not
+    # match "google"), so splitting on single spaces gives exactly the tokens
+    # a skill can line up with. One pass builds the token set; everything
+    # after that is dictionary lookups.
     text = text.lower()
+    tokens = set(text.split(" "))
     found_skills = set()
 
-    # 1. Direct Keyword Search
-    for skill in SKILL_KEYWORDS:
-        # We add spaces around the skill to avoid partial matches (e.g., "go" in "google")
-        # Regex is safer, but for now, simple string check with padding works for 90% cases
-        pattern = f" {skill} " 
-        if pattern in f" {text} ": # Pad text too
-            found_skills.add(skill)
-            
-    # 2. Check Synonyms specifically (in case user wrote 'ReactJS' which isn't in main list but is in synonyms)
-    for main, aliases in SKILL_SYNONYMS.items():
-        for alias in aliases:
-            if f" {alias} " in f" {text} ":
-                found_skills.add(main)
+    for token in tokens.intersection(_SINGLE_WORD_SKILLS):
+        found_skills |= _SINGLE_WORD_SKILLS[token]
+
+    # Multi-word phrases need their words adjacent, so only confirm the ones
+    # whose words all appear somewhere in the text
+    padded = None
+    for phrase, phrase_tokens, skills in _MULTI_WORD_SKILLS:
+        if phrase_tokens <= tokens:
+            if padded is None:
+                padded = f" {text} "
+            if f" {phrase} " in padded:
+                found_skills |= skills
 
     return found_skills
 
@@ -93,11 +123,16 @@ def match_skills(resume_skills, jd_skills):
     if not jd_skills:
         return 0, set(), set()
 
-    resume_set = normalize_skills(resume_skills)
-    jd_set = normalize_skills(jd_skills)
+    return match_normalized_skills(normalize_skills(resume_skills), normalize_skills(jd_skills))
+
+
+def match_normalized_skills(resume_set, jd_set):
+    """match_skills for sets that already went through normalize_skills (e.g. a cached JD profile)."""
+    if not jd_set:
+        return 0, set(), set()
 
     matched = resume_set.intersection(jd_set)
-    missing = jd_set - matched
+    missing = set(jd_set) - matched
 
     match_percentage = round((len(matched) / len(jd_set)) * 100)
     return match_percentage, matched, missing
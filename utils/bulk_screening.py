@@ -0,0 +1,168 @@
+import asyncio
+import heapq
+import os
+import time
+import zipfile
+
+from utils.jd_profile import match_resume_to_jd
+from utils.resume_cache import parse_resume_async
+
+# Resumes parsed at once (and, inside a ZIP, decompressed at once)
+SCREEN_CONCURRENCY = int(os.getenv("SCREEN_CONCURRENCY", str(os.cpu_count() or 4)))
+SCREEN_MAX_FILES = int(os.getenv("SCREEN_MAX_FILES", "500"))
+SCREEN_MAX_FILE_BYTES = int(os.getenv("SCREEN_MAX_FILE_BYTES", str(10 * 1024 * 1024)))
+# The whole multipart body is received before screening starts, and parts under 1MB stay in RAM,
+# so this (not the concurrency) is what bounds an upload's memory. A ZIP spools to disk instead.
+SCREEN_MAX_REQUEST_BYTES = int(os.getenv("SCREEN_MAX_REQUEST_BYTES", str(100 * 1024 * 1024)))
+# The final summary ranks only the best N candidates, so it stays small for any batch size
+SCREEN_SUMMARY_TOP = int(os.getenv("SCREEN_SUMMARY_TOP", "50"))
+
+
+class ScreeningError(Exception):
+    """Raised when an upload can't be screened at all (bad ZIP, too many files)."""
+
+
+def limit_body(receive, max_bytes=None):
+    """ASGI receive wrapper that raises ScreeningError as soon as the body grows past max_bytes."""
+    max_bytes = max_bytes or SCREEN_MAX_REQUEST_BYTES
+    received = 0
+
+    async def limited_receive():
+        nonlocal received
+        message = await receive()
+        if message["type"] == "http.request":
+            received += len(message.get("body", b""))
+            if received > max_bytes:
+                raise ScreeningError(f"Upload too large. Send at most {max_bytes // (1024 * 1024)}MB per batch.")
+        return message
+    return limited_receive
+
+
+def _is_zip(upload):
+    return upload.content_type in ("application/zip", "application/x-zip-compressed") or \
+        (upload.filename or "").lower().endswith(".zip")
+
+
+def _zip_sources(upload):
+    """One loader per PDF inside an uploaded ZIP. Members are decompressed only when their turn comes."""
+    try:
+        archive = zipfile.ZipFile(upload.file)
+    except zipfile.BadZipFile:
+        raise ScreeningError(f"{upload.filename} is not a valid ZIP file.")
+
+    for info in archive.infolist():
+        if info.is_dir() or not info.filename.lower().endswith(".pdf"):
+            continue
+        # file_size is the uncompressed size, so zip bombs are skipped before reading them
+        if info.file_size > SCREEN_MAX_FILE_BYTES:
+            yield info.filename, None
+            continue
+        yield info.filename, (lambda info=info: asyncio.to_thread(archive.read, info))
+
+
+def iter_sources(uploads):
+    """
+    (filename, loader) for every resume in the request: plain PDF uploads and the PDFs
+    inside any ZIP. loader is None for files that are skipped (wrong type, too big).
+    """
+    count = 0
+    for upload in uploads:
+        if _is_zip(upload):
+            entries = _zip_sources(upload)
+        elif upload.content_type == "application/pdf":
+            too_big = upload.size is not None and upload.size > SCREEN_MAX_FILE_BYTES
+            entries = [(upload.filename, None if too_big else upload.read)]
+        else:
+            entries = [(upload.filename, None)]
+
+        for entry in entries:
+            count += 1
+            if count > SCREEN_MAX_FILES:
+                raise ScreeningError(f"Send at most {SCREEN_MAX_FILES} resumes per batch.")
+            yield entry
+
+
+async def _screen_one(index, filename, data, jd_profile):
+    result = {"type": "candidate", "index": index, "filename": filename}
+    try:
+        parsed = await parse_resume_async(data)
+        if not parsed["raw_text"].strip():
+            return {**result, "status": "error", "message": "Could not extract text. The PDF might be an image."}
+
+        match_pct, matched, missing, sem_score = match_resume_to_jd(parsed["skills"], parsed["cleaned_text"], jd_profile)
+        return {
+            **result,
+            "status": "success",
+            "ats_score": match_pct,
+            "semantic_score": sem_score,
+            "matched_skills": sorted(matched),
+            "missing_skills": sorted(missing),
+        }
+    except Exception as e:
+        return {**result, "status": "error", "message": str(e)}
+
+
+async def screen_resumes(sources, jd_profile, concurrency=None, top_n=None):
+    """
+    Scores every (filename, loader) source against one JD profile.
+    Yields a result dict per candidate as soon as it finishes (not in upload order),
+    then one summary dict with the top candidates ranked by ATS, then semantic score.
+    """
+    concurrency = concurrency or SCREEN_CONCURRENCY
+    top_n = top_n or SCREEN_SUMMARY_TOP
+    started_at = time.perf_counter()
+    in_flight = set()
+    top = []  # min-heap of (ats, semantic, -index, entry)
+    total = succeeded = 0
+
+    def record(result):
+        nonlocal succeeded
+        if result["status"] != "success":
+            return
+        succeeded += 1
+        key = (result["ats_score"], result["semantic_score"], -result["index"])
+        entry = {k: result[k] for k in ("index", "filename", "ats_score", "semantic_score")}
+        if len(top) < top_n:
+            heapq.heappush(top, (*key, entry))
+        elif key > top[0][:3]:
+            heapq.heapreplace(top, (*key, entry))
+
+    try:
+        for index, (filename, loader) in enumerate(sources):
+            total += 1
+            if loader is None:
+                yield {"type": "candidate", "index": index, "filename": filename, "status": "error",
+                       "message": f"Skipped: not a PDF or larger than {SCREEN_MAX_FILE_BYTES} bytes."}
+                continue
+
+            # Only read (or decompress) the next file once a slot frees up, so at most `concurrency` are being parsed
+            while len(in_flight) >= concurrency:
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    record(task.result())
+                    yield task.result()
+
+            data = await loader()
+            in_flight.add(asyncio.create_task(_screen_one(index, filename, data, jd_profile)))
+            del data
+
+        while in_flight:
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                record(task.result())
+                yield task.result()
+    finally:
+        # Client disconnected or a source failed: stop the parses that are still running
+        for task in in_flight:
+            task.cancel()
+
+    elapsed = time.perf_counter() - started_at
+    yield {
+        "type": "summary",
+        "total": total,
+        "succeeded": succeeded,
+        "failed": total - succeeded,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "resumes_per_second": round(total / elapsed, 2) if elapsed else 0.0,
+        "ranking": [entry for *_, entry in sorted(top, reverse=True)],
+    }
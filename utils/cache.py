@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache bounded by total size in bytes, with a TTL per entry.
+    `sizeof` tells the cache how many bytes a value costs; keys count too.
+    """
+
+    def __init__(self, max_bytes, ttl_seconds, sizeof, max_entries=None):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._sizeof = sizeof
+        self._entries = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, size, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl_seconds=None):
+        """Stores value; ttl_seconds can shorten (never extend) the cache-wide TTL for this entry."""
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        size = _key_size(key) + self._sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            # Never let one oversized value flush the whole cache
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = (value, size, time.monotonic() + ttl)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes or (self.max_entries and len(self._entries) > self.max_entries):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _key_size(key):
+    if isinstance(key, bytes):
+        return len(key)
+    return len(str(key).encode("utf-8"))
+
+
+def text_size(*texts):
+    """Bytes taken by strings once encoded as UTF-8 (what we'd actually ship or store)."""
+    return sum(len(t.encode("utf-8")) for t in texts if t)
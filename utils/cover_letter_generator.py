@@ -1,16 +1,7 @@
-import os
-from dotenv import load_dotenv
-from google import genai
+from utils.llm_gateway import agenerate, astream, generate
 
-load_dotenv()
-client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
-
-def generate_cover_letter(resume_text, jd_text, company_name="Hiring Manager"):
-    """
-    Generates a personalized cover letter connecting resume projects to JD requirements.
-    """
-    try:
-        prompt = f"""
+def _cover_letter_prompt(resume_text, jd_text, company_name):
+    return f"""
         You are an expert Career Coach and Professional Copywriter.
         Write a convincing Cover Letter for a candidate applying to this job.
         
@@ -33,11 +24,29 @@ def generate_cover_letter(resume_text, jd_text, company_name="Hiring Manager"):
         Output only the body of the letter.
         """
 
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt
-        )
-        return response.text
+def generate_cover_letter(resume_text, jd_text, company_name="Hiring Manager"):
+    """
+    Generates a personalized cover letter connecting resume projects to JD requirements.
+    """
+    try:
+        return generate(_cover_letter_prompt(resume_text, jd_text, company_name))
+
+    except Exception as e:
+        return f"Error generating cover letter: {str(e)}"
+
+async def generate_cover_letter_async(resume_text, jd_text, company_name="Hiring Manager"):
+    """
+    Async version of generate_cover_letter for the API.
+    """
+    try:
+        return await agenerate(_cover_letter_prompt(resume_text, jd_text, company_name))
 
     except Exception as e:
-        return f"Error generating cover letter: {str(e)}"
\ No newline at end of file
+        return f"Error generating cover letter: {str(e)}"
+
+async def stream_cover_letter(resume_text, jd_text, company_name="Hiring Manager"):
+    """
+    Streams the cover letter chunk by chunk as Gemini writes it.
+    """
+    async for chunk in astream(_cover_letter_prompt(resume_text, jd_text, company_name)):
+        yield chunk
@@ -1,87 +1,131 @@
-import os
-from google import genai
+from utils.llm_cache import cached_llm, llm_cache, normalize_text
+from utils.llm_gateway import agenerate, generate, is_configured
+from utils.single_flight import SingleFlight
+
+# Bump when the hint prompt changes so cached hints are not reused
+HINT_PROMPT_VERSION = 1
+
+FALLBACK_DSA_QUESTION = "Given an array of integers nums and an integer target, return indices of the two numbers such that they add up to target.\n\nYou may assume that each input would have exactly one solution, and you may not use the same element twice.\n\nExample:\nInput: nums = [2,7,11,15], target = 9\nOutput: [0,1]"
 
 def setup_gemini():
-    # Changed this line to match your .env file!
-    api_key = os.getenv("GOOGLE_API_KEY") 
-    if not api_key:
+    # The shared client lives in llm_gateway; here we only check a key is set
+    if not is_configured():
         print("Warning: GOOGLE_API_KEY not found in environment variables.")
-        return None
-    # Initialize the new Client instead of configuring the old module
-    return genai.Client(api_key=api_key)
+        return False
+    return True
 
-def generate_dsa_question(resume_text: str):
-    client = setup_gemini()
-    if not client:
-        return "Given an array of integers nums and an integer target, return indices of the two numbers such that they add up to target.\n\nYou may assume that each input would have exactly one solution, and you may not use the same element twice.\n\nExample:\nInput: nums = [2,7,11,15], target = 9\nOutput: [0,1]"
-        
-    prompt = f"""
+def _question_prompt(resume_text: str):
+    return f"""
     Based on the following candidate resume, generate a single Data Structures and Algorithms (DSA) interview question appropriate for their skill level.
     Just output the question text and an example. Do not output the solution.
-    
+
     Resume:
     {resume_text}
     """
+
+def generate_dsa_question(resume_text: str):
+    if not setup_gemini():
+        return FALLBACK_DSA_QUESTION
+
     try:
-        # New SDK syntax
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt
-        )
-        return response.text
+        return generate(_question_prompt(resume_text))
     except Exception as e:
         return f"Error generating question: {str(e)}"
 
-def evaluate_dsa_answer(question: str, user_code: str):
-    client = setup_gemini()
-    if not client:
-        return "Error: Gemini API key not configured."
-        
-    prompt = f"""
+async def generate_dsa_question_async(resume_text: str):
+    """Async version of generate_dsa_question for the API."""
+    if not setup_gemini():
+        return FALLBACK_DSA_QUESTION
+
+    try:
+        return await agenerate(_question_prompt(resume_text))
+    except Exception as e:
+        return f"Error generating question: {str(e)}"
+
+def _evaluation_prompt(question: str, user_code: str):
+    return f"""
     You are an expert technical interviewer. The candidate was asked this question:
     {question}
-    
+
     Here is the code they submitted:
     {user_code}
-    
+
     TASK:
     1. Give a VERY brief 1-2 sentence feedback (Is it correct? What is the Time/Space complexity?).
     2. Provide the optimal solution in a clean code block.
-    
+
     STRICT RULE: Do NOT write long paragraphs or essays. Keep it punchy, professional, and short.
     """
+
+def evaluate_dsa_answer(question: str, user_code: str):
+    if not setup_gemini():
+        return "Error: Gemini API key not configured."
+
     try:
-        # New SDK syntax
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt
-        )
-        return response.text
+        return generate(_evaluation_prompt(question, user_code))
     except Exception as e:
         return f"Error evaluating code: {str(e)}"
 
-# BRAND NEW: The Senior Dev Hint Generator
-def get_dsa_hint(question: str):
-    client = setup_gemini() 
-    if not client:
+async def evaluate_dsa_answer_async(question: str, user_code: str):
+    """Async version of evaluate_dsa_answer for the API."""
+    if not setup_gemini():
         return "Error: Gemini API key not configured."
-        
-    prompt = f"""
-    You are an empathetic Senior Software Engineer mentoring a junior developer. 
+
+    try:
+        return await agenerate(_evaluation_prompt(question, user_code))
+    except Exception as e:
+        return f"Error evaluating code: {str(e)}"
+
+def _hint_prompt(question: str):
+    return f"""
+    You are an empathetic Senior Software Engineer mentoring a junior developer.
     They are stuck on this DSA question:
     {question}
-    
-    Provide ONE actionable, concrete hint (max 2 sentences). 
+
+    Provide ONE actionable, concrete hint (max 2 sentences).
     Suggest a specific data structure (e.g., "Try using a Hash Map to track complements") or a specific algorithmic pattern (e.g., "A two-pointer approach starting from both ends might work here").
-    
+
     STRICT RULE: Do NOT write the actual code. Do NOT ask cryptic, philosophical questions. Be direct, technical, and helpful.
     """
+
+@cached_llm("dsa-hint", HINT_PROMPT_VERSION, normalize_text)
+def _generate_hint(question: str):
+    return generate(_hint_prompt(question))
+
+# BRAND NEW: The Senior Dev Hint Generator
+def get_dsa_hint(question: str):
+    if not setup_gemini():
+        return "Error: Gemini API key not configured."
+
+    try:
+        return _generate_hint(question)
+    except Exception as e:
+        return f"Error generating hint: {str(e)}"
+
+# A popular question gets many hint requests at once; they wait on one generation (the cache keeps it after)
+hint_generations = SingleFlight("dsa-hint")
+
+
+async def _generate_hint_async(question: str, key: str):
+    hint = await agenerate(_hint_prompt(question))
+    await llm_cache.aset(key, hint)
+    return hint
+
+
+async def get_dsa_hint_async(question: str):
+    """
+    Async version of get_dsa_hint. Shares the response cache with it, and identical questions
+    already being answered wait on that one Gemini call (which is cancelled if they all leave).
+    """
+    if not setup_gemini():
+        return "Error: Gemini API key not configured."
+
+    key = llm_cache.make_key("dsa-hint", HINT_PROMPT_VERSION, normalize_text(question))
+    cached = await llm_cache.aget("dsa-hint", key)
+    if cached is not None:
+        return cached
+
     try:
-        # New SDK syntax
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt
-        )
-        return response.text
+        return await hint_generations.do(key, _generate_hint_async, question, key)
     except Exception as e:
-        return f"Error generating hint: {str(e)}"
\ No newline at end of file
+        return f"Error generating hint: {str(e)}"
@@ -0,0 +1,129 @@
+import json
+import os
+import threading
+import time
+
+from utils.cache import LRUCache
+
+# How long a cached profile is served without asking GitHub at all
+GITHUB_CACHE_TTL_SECONDS = float(os.getenv("GITHUB_CACHE_TTL_SECONDS", "300"))
+# After that, serve the stale copy while it is revalidated in the background
+GITHUB_CACHE_STALE_SECONDS = float(os.getenv("GITHUB_CACHE_STALE_SECONDS", "3600"))
+# Entries (and their ETags) are kept this long so old profiles can still be revalidated with a cheap 304
+GITHUB_CACHE_RETAIN_SECONDS = float(os.getenv("GITHUB_CACHE_RETAIN_SECONDS", str(7 * 24 * 3600)))
+GITHUB_CACHE_MAX_ENTRIES = int(os.getenv("GITHUB_CACHE_MAX_ENTRIES", "1000"))
+# Stop spending quota on fresh fetches once fewer than this many requests are left
+GITHUB_RATE_LIMIT_RESERVE = int(os.getenv("GITHUB_RATE_LIMIT_RESERVE", "50"))
+
+
+def _entry_size(entry):
+    return len(json.dumps(entry["metrics"]).encode("utf-8"))
+
+
+# username (lowercased) -> {"metrics", "etag", "last_modified", "fetched_at"}
+github_cache = LRUCache(
+    max_bytes=int(os.getenv("GITHUB_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+    ttl_seconds=GITHUB_CACHE_RETAIN_SECONDS,
+    sizeof=_entry_size,
+    max_entries=GITHUB_CACHE_MAX_ENTRIES,
+)
+
+
+def entry_age(entry):
+    return time.time() - entry["fetched_at"]
+
+
+def is_fresh(entry):
+    return entry_age(entry) < GITHUB_CACHE_TTL_SECONDS
+
+
+def is_servable_stale(entry):
+    return entry_age(entry) < GITHUB_CACHE_TTL_SECONDS + GITHUB_CACHE_STALE_SECONDS
+
+
+def conditional_headers(entry):
+    """If-None-Match / If-Modified-Since for revalidating a cached entry (GitHub doesn't bill 304s)."""
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def store(username, metrics, response_headers):
+    entry = {
+        "metrics": metrics,
+        "etag": response_headers.get("ETag"),
+        "last_modified": response_headers.get("Last-Modified"),
+        "fetched_at": time.time(),
+    }
+    github_cache.set(username.lower(), entry)
+    return entry
+
+
+def touch(username, entry):
+    """A 304 means our copy is still current: restart its freshness window."""
+    entry = dict(entry, fetched_at=time.time())
+    github_cache.set(username.lower(), entry)
+    return entry
+
+
+class GitHubRateLimit:
+    """Tracks the X-RateLimit-* headers so the scanner backs off before GitHub starts answering 403."""
+
+    def __init__(self, reserve):
+        self.reserve = reserve
+        self.limit = None
+        self.remaining = None
+        self.reset_at = 0.0
+        self.not_modified = 0
+        self.backoffs = 0
+        self._lock = threading.Lock()
+
+    def update(self, status_code, headers):
+        with self._lock:
+            if status_code == 304:
+                self.not_modified += 1
+            if headers.get("X-RateLimit-Remaining") is not None:
+                self.remaining = int(headers["X-RateLimit-Remaining"])
+            if headers.get("X-RateLimit-Limit") is not None:
+                self.limit = int(headers["X-RateLimit-Limit"])
+            if headers.get("X-RateLimit-Reset") is not None:
+                self.reset_at = float(headers["X-RateLimit-Reset"])
+            # Secondary rate limits come back as 403/429 with Retry-After
+            if status_code in (403, 429):
+                retry_after = headers.get("Retry-After")
+                if retry_after:
+                    self.reset_at = max(self.reset_at, time.time() + float(retry_after))
+                self.remaining = 0
+
+    def _window_open(self):
+        return self.remaining is not None and time.time() < self.reset_at
+
+    def should_back_off(self):
+        """True when we're close enough to the limit that cached data should be preferred."""
+        backing_off = self._window_open() and self.remaining <= self.reserve
+        if backing_off:
+            self.backoffs += 1
+        return backing_off
+
+    def exhausted(self):
+        return self._window_open() and self.remaining <= 0
+
+    def stats(self):
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "reset_at": self.reset_at,
+            "not_modified": self.not_modified,
+            "backoffs": self.backoffs,
+        }
+
+
+rate_limit = GitHubRateLimit(GITHUB_RATE_LIMIT_RESERVE)
+
+
+def cache_stats():
+    return {**github_cache.stats(), "rate_limit": rate_limit.stats()}
@@ -1,104 +1,204 @@
+import asyncio
+import hashlib
 import os
-import requests
-from dotenv import load_dotenv
-from google import genai
 
-# Load environment variables
-load_dotenv()
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+from utils import github_cache
+from utils.github_cache import rate_limit
+from utils.http_client import get_http_client
+from utils.llm_gateway import agenerate, generate
+from utils.single_flight import SingleFlight
+from utils.telemetry import upstream
 
-def get_github_metrics(username: str):
-    """Fetches advanced GitHub metrics AND detailed repository data for the UI."""
-    headers = {}
+EMPTY_GITHUB_METRICS = {"public_repos": 0, "total_stars": 0, "total_forks": 0, "top_languages": {}, "repositories": []}
+
+# A shared candidate link brings many clients in at once; they share one GitHub fetch and one Gemini scorecard
+github_fetches = SingleFlight("github-fetch")
+scorecard_generations = SingleFlight("github-scorecard")
+
+
+def _github_request(username: str, cached_entry=None):
+    """URL and headers for the repo listing of a user (conditional if we hold a cached copy)."""
+    headers = github_cache.conditional_headers(cached_entry)
     token = os.getenv("GITHUB_TOKEN")
     if token:
         headers["Authorization"] = f"Bearer {token}"
-        
+    # Fetch up to 100 public repositories
+    return f"https://api.github.com/users/{username}/repos?per_page=100", headers
+
+
+def _summarize_repos(repos: list):
+    """Turns the raw GitHub repo list into the metrics the UI and the AI prompt use."""
+    # Calculate the aggregate metrics
+    total_stars = sum(repo.get("stargazers_count", 0) for repo in repos)
+    total_forks = sum(repo.get("forks_count", 0) for repo in repos)
+
+    languages = {}
+    repo_names = []
+    detailed_repos = []
+
+    for repo in repos:
+        repo_names.append(repo.get("name", ""))
+
+        # Tally up the languages
+        lang = repo.get("language")
+        if lang:
+            languages[lang] = languages.get(lang, 0) + 1
+
+        # Grab the specific details for the Frontend UI Grid
+        detailed_repos.append({
+            "name": repo.get("name", "Unnamed Repo"),
+            "description": repo.get("description") or "No description provided.",
+            "url": repo.get("html_url", "#"),
+            "stars": repo.get("stargazers_count", 0),
+            "language": lang or "Mixed"
+        })
+
+    # Sort the detailed repos by Stars (highest first), so the best ones show up in the UI
+    detailed_repos = sorted(detailed_repos, key=lambda x: x['stars'], reverse=True)
+
+    return {
+        "public_repos": len(repos),
+        "total_stars": total_stars,
+        "total_forks": total_forks,
+        "top_languages": languages,
+        "repo_names": repo_names[:15], # Keep top 15 names for the Gemini AI Prompt
+        "repositories": detailed_repos[:6] # Send the top 6 fully-detailed repos to the Frontend UI
+    }
+
+
+def _handle_response(username, cached_entry, status_code, headers, read_json):
+    """Updates the rate-limit tracker and the cache from a GitHub response; returns the metrics to serve."""
+    rate_limit.update(status_code, headers)
+
+    if status_code == 304 and cached_entry:
+        return github_cache.touch(username, cached_entry)["metrics"]
+    if status_code != 200:
+        # Serve what we already have rather than an empty profile
+        return cached_entry["metrics"] if cached_entry else EMPTY_GITHUB_METRICS
+
+    return github_cache.store(username, _summarize_repos(read_json()), headers)["metrics"]
+
+
+def get_github_metrics(username: str):
+    """Fetches advanced GitHub metrics AND detailed repository data for the UI."""
+    entry = github_cache.github_cache.get(username.lower())
+    if entry and (github_cache.is_fresh(entry) or rate_limit.should_back_off()):
+        return dict(entry["metrics"])
+    if not entry and rate_limit.exhausted():
+        return dict(EMPTY_GITHUB_METRICS)
+
+    # Only the sync (Streamlit) path needs requests; the API uses the async client
+    import requests
+
+    url, headers = _github_request(username, entry)
     try:
-        # Fetch up to 100 public repositories
-        response = requests.get(f"https://api.github.com/users/{username}/repos?per_page=100", headers=headers)
-        
-        if response.status_code != 200:
-            return {"public_repos": 0, "total_stars": 0, "total_forks": 0, "top_languages": {}, "repositories": []}
-            
-        repos = response.json()
-        
-        # Calculate the aggregate metrics
-        total_stars = sum(repo.get("stargazers_count", 0) for repo in repos)
-        total_forks = sum(repo.get("forks_count", 0) for repo in repos)
-        
-        languages = {}
-        repo_names = []
-        detailed_repos = []
-        
-        for repo in repos:
-            repo_names.append(repo.get("name", ""))
-            
-            # Tally up the languages
-            lang = repo.get("language")
-            if lang:
-                languages[lang] = languages.get(lang, 0) + 1
-            
-            # Grab the specific details for the Frontend UI Grid
-            detailed_repos.append({
-                "name": repo.get("name", "Unnamed Repo"),
-                "description": repo.get("description") or "No description provided.",
-                "url": repo.get("html_url", "#"),
-                "stars": repo.get("stargazers_count", 0),
-                "language": lang or "Mixed"
-            })
-                
-        # Sort the detailed repos by Stars (highest first), so the best ones show up in the UI
-        detailed_repos = sorted(detailed_repos, key=lambda x: x['stars'], reverse=True)
-                
-        return {
-            "public_repos": len(repos),
-            "total_stars": total_stars,
-            "total_forks": total_forks,
-            "top_languages": languages,
-            "repo_names": repo_names[:15], # Keep top 15 names for the Gemini AI Prompt
-            "repositories": detailed_repos[:6] # Send the top 6 fully-detailed repos to the Frontend UI
-        }
-        
+        with upstream("github"):
+            response = requests.get(url, headers=headers)
+        return dict(_handle_response(username, entry, response.status_code, response.headers, response.json))
+
     except Exception as e:
         print(f"GitHub Fetch Error: {e}")
-        return {"public_repos": 0, "total_stars": 0, "total_forks": 0, "top_languages": {}, "repositories": []}
-    
+        return dict(entry["metrics"] if entry else EMPTY_GITHUB_METRICS)
 
-def generate_dev_scorecard(github_stats: dict):
-    """Uses advanced GitHub stats to ask Gemini to generate a developer evaluation."""
+
+async def _fetch_github_metrics_async(username: str, entry):
+    url, headers = _github_request(username, entry)
     try:
-        client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
-        
-        # Format languages nicely for the AI
-        langs = github_stats.get("top_languages", {})
-        lang_str = ", ".join([f"{k} ({v})" for k, v in langs.items()]) if langs else "None"
-        repos_str = ", ".join(github_stats.get("repo_names", []))
-        
-        prompt = f"""
-        Act as an expert Senior Engineering Manager. 
+        with upstream("github"):
+            response = await get_http_client().get(url, headers=headers)
+        return _handle_response(username, entry, response.status_code, response.headers, response.json)
+
+    except Exception as e:
+        print(f"GitHub Fetch Error: {e}")
+        return entry["metrics"] if entry else EMPTY_GITHUB_METRICS
+
+
+# username -> background revalidation task (also keeps the task referenced until it finishes)
+_revalidating = {}
+
+
+def _revalidate_in_background(username: str, entry):
+    key = username.lower()
+    if key in _revalidating:
+        return
+    task = asyncio.create_task(_fetch_github_metrics_async(username, entry))
+    _revalidating[key] = task
+    task.add_done_callback(lambda _: _revalidating.pop(key, None))
+
+
+async def get_github_metrics_async(username: str):
+    """
+    Async version of get_github_metrics for the API, on the shared pooled HTTP client.
+    Fresh cache hits skip GitHub entirely; stale ones are served immediately and revalidated in the background.
+    """
+    entry = github_cache.github_cache.get(username.lower())
+    if entry:
+        if github_cache.is_fresh(entry) or rate_limit.should_back_off():
+            return dict(entry["metrics"])
+        if github_cache.is_servable_stale(entry):
+            _revalidate_in_background(username, entry)
+            return dict(entry["metrics"])
+    elif rate_limit.exhausted():
+        return dict(EMPTY_GITHUB_METRICS)
+
+    # Everyone shares one metrics dict here, so each caller gets its own copy
+    return dict(await github_fetches.do(username.lower(), _fetch_github_metrics_async, username, entry))
+
+
+def _build_scorecard_prompt(github_stats: dict):
+    # Format languages nicely for the AI
+    langs = github_stats.get("top_languages", {})
+    lang_str = ", ".join([f"{k} ({v})" for k, v in langs.items()]) if langs else "None"
+    repos_str = ", ".join(github_stats.get("repo_names", []))
+
+    return f"""
+        Act as an expert Senior Engineering Manager.
         Write a 2-sentence "Developer Persona" summary for this candidate based on their GitHub data.
         Make it sound highly professional, impressive, and tailored exactly to their tech stack.
-        
+
         GitHub Stats:
         - Public Repos: {github_stats.get("public_repos")}
         - Total Stars: {github_stats.get("total_stars")}
         - Total Forks: {github_stats.get("total_forks")}
         - Top Languages: {lang_str}
         - Key Repositories: {repos_str}
-        
+
         Do not use formatting like bolding or bullet points. Just write the short paragraph.
         """
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt,
-        )
-        return response.text.strip()
+
+
+SCORECARD_FALLBACK = "An active developer consistently building projects and contributing to the open-source community."
+
+
+def generate_dev_scorecard(github_stats: dict):
+    """Uses advanced GitHub stats to ask Gemini to generate a developer evaluation."""
+    try:
+        return generate(_build_scorecard_prompt(github_stats)).strip()
+    except Exception as e:
+        print(f"Gemini Error: {e}")
+        return SCORECARD_FALLBACK
+
+
+async def _generate_scorecard_async(prompt: str):
+    return (await agenerate(prompt)).strip()
+
+
+async def generate_dev_scorecard_async(github_stats: dict):
+    """Async version of generate_dev_scorecard. Identical stats in flight at once share one Gemini call."""
+    prompt = _build_scorecard_prompt(github_stats)
+    key = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    try:
+        return await scorecard_generations.do(key, _generate_scorecard_async, prompt)
     except Exception as e:
         print(f"Gemini Error: {e}")
-        return "An active developer consistently building projects and contributing to the open-source community."
-    
+        return SCORECARD_FALLBACK
+
 
 def analyze_github_profile(username: str):
     """Wrapper function to connect the old api.py to our new upgraded metrics."""
-    return get_github_metrics(username)
\ No newline at end of file
+    return get_github_metrics(username)
+
+
+async def analyze_github_profile_async(username: str):
+    """Async counterpart of analyze_github_profile."""
+    return await get_github_metrics_async(username)
@@ -0,0 +1,33 @@
+import os
+
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "10"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+
+_client = None
+
+
+def get_http_client():
+    """
+    Shared async httpx client for outbound calls (GitHub, etc.).
+    One pooled client means keep-alive connections are reused across requests.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        import httpx
+
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_CONNECTIONS // 4,
+            ),
+        )
+    return _client
+
+
+async def close_http_client():
+    """Closes the pooled client (called on app shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -1,45 +1,41 @@
-import os
-from dotenv import load_dotenv
-from google import genai
+from utils.llm_gateway import astream, generate
 
-load_dotenv()
-
-# Initialize the new client
-client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
-
-def generate_interview_questions(resume_text, jd_text):
-    """
-    Generates 5 custom interview questions based on the candidate's specific experience.
-    """
-    try:
-        prompt = f"""
-        You are an expert Technical Interviewer. 
+def _interview_prompt(resume_text, jd_text):
+    return f"""
+        You are an expert Technical Interviewer.
         I am going to give you a candidate's Resume and a Job Description.
-        
+
         Your goal is to generate 5 TOUGH, specific interview questions.
-        
+
         RULES:
         1. Do NOT ask generic questions (e.g., "Tell me about yourself").
         2. Ask specific technical questions based on the PROJECTS mentioned in the resume.
         3. If they mention a specific tool (e.g., "React"), ask how they handled a specific problem with it.
         4. Relate the questions to the Job Description requirements.
-        
+
         RESUME TEXT:
         {resume_text[:2000]}
-        
+
         JOB DESCRIPTION:
         {jd_text[:1000]}
-        
+
         OUTPUT FORMAT:
         Return exactly 5 questions, numbered 1 to 5.
         """
 
-        # New SDK syntax for generating content
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt
-        )
-        return response.text
+def generate_interview_questions(resume_text, jd_text):
+    """
+    Generates 5 custom interview questions based on the candidate's specific experience.
+    """
+    try:
+        return generate(_interview_prompt(resume_text, jd_text))
 
     except Exception as e:
-        return f"Error generating questions: {str(e)}"
\ No newline at end of file
+        return f"Error generating questions: {str(e)}"
+
+async def stream_interview_questions(resume_text, jd_text):
+    """
+    Streams the interview questions chunk by chunk as Gemini writes them.
+    """
+    async for chunk in astream(_interview_prompt(resume_text, jd_text)):
+        yield chunk
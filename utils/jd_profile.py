@@ -0,0 +1,62 @@
+import hashlib
+import os
+
+from utils.ats_matcher import extract_skills_from_text, match_normalized_skills, normalize_skills
+from utils.cache import LRUCache, text_size
+from utils.semantic_matcher import semantic_match_from_words, tokenize
+from utils.telemetry import traced
+
+JD_CACHE_MAX_BYTES = int(os.getenv("JD_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+JD_CACHE_TTL_SECONDS = float(os.getenv("JD_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+
+def _profile_size(profile):
+    return text_size(profile["text"], *profile["skills"], *profile["tokens"])
+
+
+# Keyed by jd_id (the SHA-256 of the normalized JD text). Entries are per process; the text itself
+# is also stored in the job_descriptions table, so a worker that never saw a jd_id rebuilds the profile from it.
+jd_cache = LRUCache(JD_CACHE_MAX_BYTES, JD_CACHE_TTL_SECONDS, _profile_size)
+
+
+def make_jd_id(job_description: str) -> str:
+    return hashlib.sha256(job_description.lower().encode("utf-8")).hexdigest()
+
+
+@traced("jd.profile")
+def get_jd_profile(job_description: str) -> dict:
+    """
+    Everything the matchers need from a job description, computed once per posting:
+    the normalized text, its canonical skill set and its token set.
+    The same JD text sent again (or registered earlier) comes from the cache.
+    """
+    jd_id = make_jd_id(job_description)
+    profile = jd_cache.get(jd_id)
+    if profile is not None:
+        return profile
+
+    text = job_description.lower()
+    profile = {
+        "jd_id": jd_id,
+        "text": text,
+        # frozensets: the cached profile is shared between requests
+        "skills": frozenset(normalize_skills(extract_skills_from_text(text))),
+        "tokens": frozenset(tokenize(text)),
+    }
+    jd_cache.set(jd_id, profile)
+    return profile
+
+
+def get_jd_profile_by_id(jd_id: str):
+    """The profile if this process has it in memory, else None (look the text up in the database)."""
+    return jd_cache.get(jd_id)
+
+
+def match_resume_to_jd(resume_skills, cleaned_text: str, profile: dict):
+    """
+    Same numbers as match_skills + calculate_semantic_match, but only the resume side is computed.
+    Returns (match_pct, matched, missing, semantic_score).
+    """
+    match_pct, matched, missing = match_normalized_skills(normalize_skills(resume_skills), profile["skills"])
+    sem_score = semantic_match_from_words(set(tokenize(cleaned_text)), profile["tokens"])
+    return match_pct, matched, missing, sem_score
@@ -1,40 +1,55 @@
-import os
-from dotenv import load_dotenv
-from google import genai
+from utils.llm_cache import cached_llm, llm_cache, normalize_skill_list
+from utils.llm_gateway import astream, generate
 
-load_dotenv()
+# Bump when the prompt below changes so cached plans are not reused
+STUDY_PLAN_PROMPT_VERSION = 1
 
-# Initialize the new client
-client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+def _plan_prompt(skills):
+    skills_text = ", ".join(skills)
+
+    return f"""
+    You are a Senior Technical Mentor.
+    The candidate is missing the following skills: {skills_text}.
+
+    Create a customized "5-Day Crash Course" to help them learn the basics of these skills efficiently.
+
+    STRUCTURE:
+    - **Day 1-2: Concepts & Basics** (What is it? Why use it?)
+    - **Day 3-4: Hands-on Practice** (Simple exercises or commands)
+    - **Day 5: Mini Project Idea** (How to apply it to a resume project)
+    - **Recommended Resources:** (Suggest specific official docs, YouTube channels, or free courses).
+
+    Keep it concise, actionable, and encouraging.
+    """
+
+@cached_llm("study-plan", STUDY_PLAN_PROMPT_VERSION, list)
+def _generate_plan(skills):
+    return generate(_plan_prompt(skills))
 
 def generate_study_plan(missing_skills):
     """
     Generates a 5-day crash course for the identified missing skills.
     """
     try:
-        skills_text = ", ".join(missing_skills)
-
-        prompt = f"""
-        You are a Senior Technical Mentor.
-        The candidate is missing the following skills: {skills_text}.
-        
-        Create a customized "5-Day Crash Course" to help them learn the basics of these skills efficiently.
-        
-        STRUCTURE:
-        - **Day 1-2: Concepts & Basics** (What is it? Why use it?)
-        - **Day 3-4: Hands-on Practice** (Simple exercises or commands)
-        - **Day 5: Mini Project Idea** (How to apply it to a resume project)
-        - **Recommended Resources:** (Suggest specific official docs, YouTube channels, or free courses).
-        
-        Keep it concise, actionable, and encouraging.
-        """
-
-        # New SDK syntax for generating content
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt
-        )
-        return response.text
+        # Sorted and de-duplicated, so the same skill gap always maps to the same cached plan
+        return _generate_plan(tuple(normalize_skill_list(missing_skills)))
 
     except Exception as e:
-        return f"Error generating roadmap: {str(e)}"
\ No newline at end of file
+        return f"Error generating roadmap: {str(e)}"
+
+async def stream_study_plan(missing_skills):
+    """
+    Streams the study plan as Gemini writes it. Shares the response cache with generate_study_plan.
+    """
+    skills = tuple(normalize_skill_list(missing_skills))
+    key = llm_cache.make_key("study-plan", STUDY_PLAN_PROMPT_VERSION, list(skills))
+    cached = await llm_cache.aget("study-plan", key)
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    async for chunk in astream(_plan_prompt(skills)):
+        parts.append(chunk)
+        yield chunk
+    await llm_cache.aset(key, "".join(parts))
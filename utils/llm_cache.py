@@ -0,0 +1,165 @@
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.cache import LRUCache, text_size
+
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(24 * 3600)))
+# Optional second tier that survives restarts, e.g. /tmp/llm_cache.sqlite3 on Vercel
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB")
+
+
+def normalize_text(text):
+    """Case and whitespace don't change what Gemini writes back, so they don't change the key."""
+    return re.sub(r"\s+", " ", str(text)).strip().casefold()
+
+
+def normalize_skill_list(skills):
+    """Sorted, de-duplicated skills: ["SQL", "docker", "sql"] and ["docker", "sql"] share one plan."""
+    return sorted({normalize_text(skill) for skill in skills if normalize_text(skill)})
+
+
+class _DiskTier:
+    """
+    SQLite key/value table with expiry, shared by every worker that points at the same file.
+    Async callers use aget/aset, which run on the tier's own thread instead of the event loop.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="llm-cache")
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM llm_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl_seconds):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl_seconds),
+            )
+            self._conn.commit()
+
+    async def aget(self, key):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.get, key)
+
+    async def aset(self, key, value, ttl_seconds):
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.set, key, value, ttl_seconds)
+
+
+class LLMResponseCache:
+    """In-memory LRU of generated text, optionally backed by a SQLite file, with per-endpoint hit counters."""
+
+    def __init__(self, max_bytes, ttl_seconds, disk_path=None):
+        self.ttl_seconds = ttl_seconds
+        self._memory = LRUCache(max_bytes, ttl_seconds, text_size)
+        self._disk = _DiskTier(disk_path) if disk_path else None
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    @staticmethod
+    def make_key(endpoint, template_version, normalized_inputs):
+        payload = json.dumps([endpoint, template_version, normalized_inputs], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, endpoint, outcome):
+        with self._lock:
+            counters = self._counters.setdefault(endpoint, {"memory_hits": 0, "disk_hits": 0, "misses": 0})
+            counters[outcome] += 1
+
+    def get(self, endpoint, key):
+        value = self._memory.get(key)
+        if value is not None:
+            self._count(endpoint, "memory_hits")
+            return value
+
+        if self._disk:
+            value = self._disk.get(key)
+            if value is not None:
+                self._memory.set(key, value)
+                self._count(endpoint, "disk_hits")
+                return value
+
+        self._count(endpoint, "misses")
+        return None
+
+    async def aget(self, endpoint, key):
+        """get() for async code: the disk tier is read off the event loop."""
+        value = self._memory.get(key)
+        if value is not None:
+            self._count(endpoint, "memory_hits")
+            return value
+
+        if self._disk:
+            value = await self._disk.aget(key)
+            if value is not None:
+                self._memory.set(key, value)
+                self._count(endpoint, "disk_hits")
+                return value
+
+        self._count(endpoint, "misses")
+        return None
+
+    def set(self, key, value):
+        # An empty answer (e.g. Gemini blocked the response, so .text is None) is not worth keeping
+        if not value:
+            return
+        self._memory.set(key, value)
+        if self._disk:
+            self._disk.set(key, value, self.ttl_seconds)
+
+    async def aset(self, key, value):
+        """set() for async code: the disk tier is written off the event loop."""
+        if not value:
+            return
+        self._memory.set(key, value)
+        if self._disk:
+            await self._disk.aset(key, value, self.ttl_seconds)
+
+    def stats(self):
+        with self._lock:
+            per_endpoint = {}
+            for endpoint, counters in self._counters.items():
+                lookups = sum(counters.values())
+                hits = counters["memory_hits"] + counters["disk_hits"]
+                per_endpoint[endpoint] = {**counters, "hit_ratio": round(hits / lookups, 4) if lookups else 0.0}
+        return {"endpoints": per_endpoint, "memory": self._memory.stats(), "disk_enabled": self._disk is not None}
+
+
+llm_cache = LLMResponseCache(LLM_CACHE_MAX_BYTES, LLM_CACHE_TTL_SECONDS, LLM_CACHE_DB)
+
+
+def cached_llm(endpoint, template_version, normalize):
+    """
+    Caches a generator's text output under (endpoint, template_version, normalize(*args)).
+    Bump template_version whenever the prompt changes. Only successful results are cached:
+    the wrapped function should raise on failure rather than return an error message.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args):
+            key = llm_cache.make_key(endpoint, template_version, normalize(*args))
+            text = llm_cache.get(endpoint, key)
+            if text is None:
+                text = fn(*args)
+                llm_cache.set(key, text)
+            return text
+        return wrapper
+    return decorator
@@ -1,22 +1,18 @@
-from google import genai
 import streamlit as st
-import os
 
+from utils import llm_gateway
+
+# Prefer the Streamlit secret; otherwise the gateway falls back to GOOGLE_API_KEY
 try:
-    api_key = st.secrets["GOOGLE_API_KEY"]
+    llm_gateway.configure(st.secrets["GOOGLE_API_KEY"])
 except:
-    api_key = os.getenv("GOOGLE_API_KEY")
-
-# Initialize the new client if the key exists
-client = None
-if api_key:
-    client = genai.Client(api_key=api_key)
+    pass
 
 def get_ai_feedback(resume_text, jd_text, missing_skills):
     """
     Asks Gemini to provide actionable advice on HOW to fill the missing gaps.
     """
-    if not client:
+    if not llm_gateway.is_configured():
         return "⚠️ Google API Key not found. Please check your secrets.toml file."
 
     # Create a focused prompt
@@ -42,10 +38,6 @@ def get_ai_feedback(resume_text, jd_text, missing_skills):
     """
     
     try:
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt
-        )
-        return response.text
+        return llm_gateway.generate(prompt)
     except Exception as e:
         return f"Error generating advice: {str(e)}"
\ No newline at end of file
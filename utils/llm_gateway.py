@@ -0,0 +1,293 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from utils.telemetry import upstream
+
+# google-genai takes ~0.5s to import, so the SDK is loaded with the first
+# Gemini call instead of at server boot
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+# Max Gemini calls in flight at once from this process
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+
+_api_key = None
+_client = None
+_client_lock = threading.Lock()
+
+
+class LLMNotConfigured(RuntimeError):
+    """Raised when no Gemini API key is available."""
+
+
+def configure(api_key):
+    """Overrides the key read from GOOGLE_API_KEY (e.g. the Streamlit app passes st.secrets)."""
+    global _api_key, _client
+    with _client_lock:
+        _api_key = api_key
+        _client = None
+
+
+def is_configured():
+    return bool(_api_key or os.getenv("GOOGLE_API_KEY"))
+
+
+def get_client():
+    """The one long-lived Gemini client; its HTTP connections are kept alive and reused."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                api_key = _api_key or os.getenv("GOOGLE_API_KEY")
+                if not api_key:
+                    raise LLMNotConfigured("Gemini API key not configured.")
+                from google import genai
+                _client = genai.Client(api_key=api_key)
+    return _client
+
+
+def _is_retryable(error):
+    import httpx
+    from google.genai import errors
+
+    if isinstance(error, errors.APIError):
+        return error.code == 429 or error.code >= 500
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError, TimeoutError))
+
+
+def _backoff(attempt):
+    # Full jitter so a burst of failed calls doesn't retry in lockstep
+    return random.uniform(0, LLM_RETRY_BASE_SECONDS * (2 ** attempt))
+
+
+def _config(timeout):
+    from google.genai import types
+
+    return types.GenerateContentConfig(
+        http_options=types.HttpOptions(timeout=int((timeout or LLM_TIMEOUT_SECONDS) * 1000))
+    )
+
+
+class _Slots:
+    """
+    The one limit on Gemini calls in flight, shared by the sync path (threadpool routes, Streamlit)
+    and the async path (the event loop). Waiters are served first come, first served; a released
+    slot is handed straight to the next one. Use `with` in threads and `async with` on the loop.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._free = limit
+        self._lock = threading.Lock()
+        self._waiters = deque()  # threading.Event for threads, (loop, future) for coroutines
+
+    def __enter__(self):
+        with self._lock:
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+                return self
+            ready = threading.Event()
+            self._waiters.append(ready)
+        ready.wait()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+    async def __aenter__(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+                return self
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                queued = waiter in self._waiters
+                if queued:
+                    self._waiters.remove(waiter)
+            # Handed a slot just as we were cancelled: pass it on (a cancelled future is passed on by _grant)
+            if not queued and waiter[1].done() and not waiter[1].cancelled():
+                self.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+    def release(self):
+        with self._lock:
+            if not self._waiters:
+                self._free += 1
+                return
+            waiter = self._waiters.popleft()
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+            return
+        loop, future = waiter
+        try:
+            loop.call_soon_threadsafe(self._grant, future)
+        except RuntimeError:
+            # That waiter's loop is closed; the slot goes to the next one
+            self.release()
+
+    def _grant(self, future):
+        if future.done():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def snapshot(self):
+        with self._lock:
+            return {"limit": self.limit, "in_flight": self.limit - self._free, "waiting": len(self._waiters)}
+
+
+# Slots are held only while a request is out: never through a retry backoff
+slots = _Slots(LLM_MAX_CONCURRENCY)
+
+
+class _LatencyStats:
+    """Running totals for every Gemini call routed through the gateway."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds, ok):
+        with self._lock:
+            self.calls += 1
+            self.errors += 0 if ok else 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def retried(self):
+        with self._lock:
+            self.retries += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "retries": self.retries,
+                "avg_ms": round(self.total_seconds / self.calls * 1000, 1) if self.calls else 0.0,
+                "max_ms": round(self.max_seconds * 1000, 1),
+            }
+
+
+stats = _LatencyStats()
+
+
+def generate(prompt, model=DEFAULT_MODEL, timeout=None):
+    """Sends one prompt to Gemini and returns the response text. Retries transient failures."""
+    client = get_client()
+    start = time.perf_counter()
+    attempt = 0
+    with upstream("gemini"):
+        while True:
+            try:
+                with slots:
+                    response = client.models.generate_content(model=model, contents=prompt, config=_config(timeout))
+                stats.record(time.perf_counter() - start, True)
+                return response.text
+            except Exception as e:
+                if attempt >= LLM_MAX_RETRIES or not _is_retryable(e):
+                    stats.record(time.perf_counter() - start, False)
+                    raise
+                stats.retried()
+                time.sleep(_backoff(attempt))
+                attempt += 1
+
+
+async def agenerate(prompt, model=DEFAULT_MODEL, timeout=None):
+    """Async version of generate() on the SDK's aio client."""
+    client = get_client()
+    start = time.perf_counter()
+    attempt = 0
+    async with upstream("gemini"):
+        while True:
+            try:
+                async with slots:
+                    response = await client.aio.models.generate_content(model=model, contents=prompt, config=_config(timeout))
+                stats.record(time.perf_counter() - start, True)
+                return response.text
+            except Exception as e:
+                if attempt >= LLM_MAX_RETRIES or not _is_retryable(e):
+                    stats.record(time.perf_counter() - start, False)
+                    raise
+                stats.retried()
+                await asyncio.sleep(_backoff(attempt))
+                attempt += 1
+
+
+async def astream(prompt, model=DEFAULT_MODEL, timeout=None):
+    """
+    Yields the response text chunk by chunk as Gemini produces it.
+    Transient failures are retried only until the first chunk has been sent.
+    """
+    client = get_client()
+    start = time.perf_counter()
+    attempt = 0
+    async with upstream("gemini"):
+        while True:
+            sent_any = False
+            try:
+                async with slots:
+                    stream = await client.aio.models.generate_content_stream(model=model, contents=prompt, config=_config(timeout))
+                    async for chunk in stream:
+                        if chunk.text:
+                            sent_any = True
+                            yield chunk.text
+                stats.record(time.perf_counter() - start, True)
+                return
+            except Exception as e:
+                if sent_any or attempt >= LLM_MAX_RETRIES or not _is_retryable(e):
+                    stats.record(time.perf_counter() - start, False)
+                    raise
+                stats.retried()
+                await asyncio.sleep(_backoff(attempt))
+                attempt += 1
+
+
+class _StreamTimings:
+    """Time-to-first-byte next to total time, per streaming endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, ttfb_seconds, total_seconds):
+        with self._lock:
+            totals = self._endpoints.setdefault(endpoint, {"streams": 0, "ttfb": 0.0, "total": 0.0})
+            totals["streams"] += 1
+            totals["ttfb"] += ttfb_seconds
+            totals["total"] += total_seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    "streams": t["streams"],
+                    "avg_ttfb_ms": round(t["ttfb"] / t["streams"] * 1000, 1),
+                    "avg_total_ms": round(t["total"] / t["streams"] * 1000, 1),
+                }
+                for endpoint, t in self._endpoints.items()
+            }
+
+
+stream_timings = _StreamTimings()
@@ -0,0 +1,95 @@
+import bisect
+import threading
+
+# Upper bounds (ms) of the latency buckets; anything slower lands in +Inf
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram per named operation (e.g. "evaluations.insert").
+    Cheap to record; percentiles are estimated as the upper bound of the bucket they fall in.
+    """
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._lock = threading.Lock()
+        self._series = {}  # name -> {"counts": [...], "count": n, "sum": seconds, "errors": n}
+
+    def observe(self, name, seconds, ok=True):
+        ms = seconds * 1000
+        index = bisect.bisect_left(self.buckets_ms, ms)
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                series = self._series[name] = {"counts": [0] * (len(self.buckets_ms) + 1), "count": 0, "sum": 0.0, "errors": 0}
+            series["counts"][index] += 1
+            series["count"] += 1
+            series["sum"] += seconds
+            series["errors"] += 0 if ok else 1
+
+    def _percentile(self, counts, total, q):
+        target = q * total
+        running = 0
+        for bound, count in zip(self.buckets_ms + (float("inf"),), counts):
+            running += count
+            if running >= target:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        with self._lock:
+            series = {name: {**s, "counts": list(s["counts"])} for name, s in self._series.items()}
+
+        labels = [f"le_{bound}ms" for bound in self.buckets_ms] + ["le_inf"]
+        return {
+            name: {
+                "count": s["count"],
+                "errors": s["errors"],
+                "avg_ms": round(s["sum"] / s["count"] * 1000, 1) if s["count"] else 0.0,
+                "p50_ms": self._percentile(s["counts"], s["count"], 0.5),
+                "p95_ms": self._percentile(s["counts"], s["count"], 0.95),
+                "p99_ms": self._percentile(s["counts"], s["count"], 0.99),
+                "buckets": dict(zip(labels, s["counts"])),
+            }
+            for name, s in series.items()
+        }
+
+    def prometheus(self, metric, labels):
+        """
+        Prometheus text lines: a `<metric>` histogram in seconds plus a `<metric>_errors_total` counter.
+        Series names are label values; use a tuple of them when `labels` names more than one label.
+        """
+        with self._lock:
+            series = {name: {**s, "counts": list(s["counts"])} for name, s in self._series.items()}
+
+        bounds = [f"{bound / 1000:g}" for bound in self.buckets_ms] + ["+Inf"]
+        lines = [f"# TYPE {metric} histogram"]
+        errors = [f"# TYPE {metric}_errors_total counter"]
+        for name, s in series.items():
+            label_str = format_labels(labels, name)
+            running = 0
+            for bound, count in zip(bounds, s["counts"]):
+                running += count
+                lines.append(f'{metric}_bucket{{{label_str},le="{bound}"}} {running}')
+            lines.append(f"{metric}_sum{{{label_str}}} {s['sum']:.6f}")
+            lines.append(f"{metric}_count{{{label_str}}} {s['count']}")
+            errors.append(f"{metric}_errors_total{{{label_str}}} {s['errors']}")
+        return lines + errors
+
+
+def format_labels(labels, values):
+    """('method', 'route'), ('GET', '/api/x') -> method="GET",route="/api/x" (escaped for the text format)."""
+    if isinstance(labels, str):
+        labels, values = (labels,), (values,)
+    elif isinstance(values, str):
+        values = (values,)
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return ",".join(f'{label}="{value}"' for label, value in zip(labels, escaped))
+
+
+def counter_lines(metric, labels, values):
+    """Prometheus counter lines from {label value(s): number}."""
+    return [f"# TYPE {metric} counter"] + [
+        f"{metric}{{{format_labels(labels, name)}}} {value}" for name, value in values.items()
+    ]
@@ -0,0 +1,71 @@
+import base64
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime
+
+from utils.response_encoding import dumps
+
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "50"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "100"))
+
+# Columns each list endpoint may project; id and created_at are always returned (the cursor needs them)
+APPLICATION_COLUMNS = ("id", "created_at", "user_id", "company_name", "job_title", "match_score", "status")
+HISTORY_COLUMNS = ("id", "created_at", "user_email", "match_score", "semantic_score", "missing_skills")
+
+
+def page_size(limit) -> int:
+    if not limit:
+        return PAGE_SIZE_DEFAULT
+    return max(1, min(int(limit), PAGE_SIZE_MAX))
+
+
+def projection(fields, allowed) -> str:
+    """'company_name,status' -> 'id,created_at,company_name,status'. Raises ValueError on unknown columns."""
+    if not fields:
+        return ",".join(allowed)
+    wanted = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in wanted if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Choose from: {', '.join(allowed)}.")
+    return ",".join(dict.fromkeys(["id", "created_at", *wanted]))
+
+
+def encode_cursor(row) -> str:
+    """Opaque cursor pointing just after `row` (the last row of a page)."""
+    raw = json.dumps([row["created_at"], row["id"]], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    (created_at, id) from a cursor, or None for the first page. Raises ValueError if it was tampered with.
+    The values end up inside a PostgREST filter, so only an ISO timestamp and a UUID or integer id get through.
+    """
+    if not cursor:
+        return None
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        created_at, row_id = str(created_at), str(row_id)
+        datetime.fromisoformat(created_at)
+        if not (row_id.isascii() and row_id.isdigit()):
+            row_id = str(uuid.UUID(row_id))
+        return created_at, row_id
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor.")
+
+
+def page_body(rows, limit):
+    """
+    Serialized JSON body and ETag for one page. `rows` holds up to limit + 1 rows;
+    the extra one only tells us whether there is a next page.
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    body = dumps({
+        "status": "success",
+        "data": rows,
+        "next_cursor": encode_cursor(rows[-1]) if has_more else None,
+    })
+    return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
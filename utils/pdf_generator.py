@@ -1,6 +1,14 @@
-from fpdf import FPDF
+from utils.telemetry import traced
+
+# Bump when either layout changes, so cached renders (utils/report_cache.py) are not reused
+REPORT_TEMPLATE_VERSION = 1
+
+
+def render_fpdf_report(eval_data: dict) -> bytes:
+    """The one-page evaluation scorecard, rendered in memory with fpdf."""
+    # Imported on first use so the API can boot without loading fpdf
+    from fpdf import FPDF
 
-def create_pdf_report(eval_data: dict, filename="candidate_report.pdf"):
     # 1. Create a blank PDF document
     pdf = FPDF()
     pdf.add_page()
@@ -46,6 +54,45 @@ def create_pdf_report(eval_data: dict, filename="candidate_report.pdf"):
     clean_text = ai_text.encode('latin-1', 'replace').decode('latin-1')
     pdf.multi_cell(0, 6, clean_text)
     
-    # 6. Save the actual file!
-    pdf.output(filename)
+    # 6. Render to bytes (fpdf 1.x returns a latin-1 str, fpdf2 a bytearray)
+    output = pdf.output(dest='S')
+    return output.encode('latin-1') if isinstance(output, str) else bytes(output)
+
+
+def render_reportlab_report(eval_data: dict) -> bytes:
+    """The longer career report (scores table, advice, interview prep, study plan), rendered with ReportLab."""
+    from utils.report_generator import generate_pdf_report
+
+    buffer = generate_pdf_report(
+        eval_data.get('name') or eval_data.get('github_username', 'Candidate'),
+        eval_data.get('ats_score', 0),
+        eval_data.get('semantic_score', 0),
+        eval_data.get('missing_skills', []),
+        eval_data.get('ai_advice') or eval_data.get('ai_scorecard', 'No advice generated.'),
+        interview_q=eval_data.get('interview_questions'),
+        study_plan=eval_data.get('study_plan'),
+        improved_bullets=eval_data.get('improved_bullets'),
+    )
+    return buffer.getvalue()
+
+
+# Every renderer takes the eval_data dict and returns the finished PDF as bytes
+RENDERERS = {
+    "fpdf": render_fpdf_report,
+    "reportlab": render_reportlab_report,
+}
+
+
+@traced("pdf.render")
+def render_report(eval_data: dict, renderer: str = "fpdf") -> bytes:
+    """Renders a report entirely in memory. Nothing touches the disk, so concurrent calls can't collide."""
+    if renderer not in RENDERERS:
+        raise ValueError(f"Unknown renderer '{renderer}'. Use one of: {', '.join(RENDERERS)}.")
+    return RENDERERS[renderer](eval_data)
+
+
+def create_pdf_report(eval_data: dict, filename="candidate_report.pdf"):
+    """Renders the fpdf scorecard and saves it to `filename` (for scripts; the API uses render_report)."""
+    with open(filename, 'wb') as f:
+        f.write(render_fpdf_report(eval_data))
     return filename
\ No newline at end of file
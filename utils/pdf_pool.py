@@ -0,0 +1,242 @@
+import asyncio
+import contextvars
+import functools
+import io
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.pdf_reader import PDFExtractionError, read_pdf_text
+
+# pdfplumber is pure Python and CPU-bound, so PDFs are parsed in separate processes:
+# parses run on every core, and a PDF that hangs or balloons only takes down its own worker.
+# PDF_POOL_WORKERS=0 parses in the calling thread instead (no processes, no hard limits).
+PDF_POOL_WORKERS = int(os.getenv("PDF_POOL_WORKERS", str(os.cpu_count() or 2)))
+# Hard wall-clock limit per document; the worker is killed when it runs out
+PDF_POOL_TIMEOUT_SECONDS = float(os.getenv("PDF_POOL_TIMEOUT_SECONDS", "20"))
+# Workers are replaced after this many documents, or once their RSS goes over the cap
+PDF_POOL_MAX_JOBS_PER_WORKER = int(os.getenv("PDF_POOL_MAX_JOBS_PER_WORKER", "200"))
+PDF_POOL_MAX_RSS_MB = int(os.getenv("PDF_POOL_MAX_RSS_MB", "512"))
+# Documents allowed to wait for a free worker before new ones are turned away
+PDF_POOL_MAX_QUEUE = int(os.getenv("PDF_POOL_MAX_QUEUE", "256"))
+PDF_POOL_START_METHOD = os.getenv("PDF_POOL_START_METHOD", "spawn")
+
+_POLL_SECONDS = 0.1
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _worker_main(conn):
+    """Runs in the child: parse whatever arrives on the pipe until told to stop."""
+    import pdfplumber  # noqa: F401  (pay the import once, when the worker starts)
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+
+        data, max_pages, time_budget = job
+        try:
+            conn.send(("ok", read_pdf_text(io.BytesIO(data), max_pages, time_budget)))
+        except Exception as e:
+            conn.send(("error", str(e) or type(e).__name__))
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def rss_bytes(self):
+        """Current resident memory of the worker, or None where /proc isn't available."""
+        try:
+            with open(f"/proc/{self.process.pid}/statm") as f:
+                return int(f.read().split()[1]) * _PAGE_SIZE
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+            self.process.join(1)
+        except OSError:
+            pass
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class PDFWorkerPool:
+    """
+    Process pool for PDF text extraction with a hard timeout and RSS cap per document.
+    extract() blocks the calling thread; async code goes through run(), which waits on the
+    pool's own threads so slow PDFs never tie up asyncio's default executor.
+    """
+
+    def __init__(self, workers, timeout_seconds, max_jobs_per_worker, max_rss_mb, max_queue, start_method="spawn"):
+        self.workers = workers
+        self.timeout_seconds = timeout_seconds
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+        self.max_queue = max_queue
+        self._context = multiprocessing.get_context(start_method)
+        self._cond = threading.Condition()
+        self._idle = []
+        self._live = 0
+        self._busy = 0
+        self._waiting = 0
+        self._max_waiting = 0
+        self._jobs = 0
+        self._errors = 0
+        self._timeouts = 0
+        self._memory_kills = 0
+        self._crashes = 0
+        self._recycled = 0
+        self._total_seconds = 0.0
+        # One thread per document that can be parsing or queued; anything beyond that is turned away by _acquire
+        self._threads = ThreadPoolExecutor(max(workers, 1) + max_queue, thread_name_prefix="pdf-pool")
+
+    async def run(self, fn, *args):
+        """Awaits fn(*args) (anything that ends up in extract()) on the pool's threads, keeping the caller's context."""
+        call = functools.partial(contextvars.copy_context().run, fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(self._threads, call)
+
+    def _acquire(self):
+        with self._cond:
+            if self._waiting >= self.max_queue:
+                raise PDFExtractionError("Too many PDFs are waiting to be read. Try again shortly.")
+            self._waiting += 1
+            self._max_waiting = max(self._max_waiting, self._waiting)
+            try:
+                while not self._idle and self._live >= self.workers:
+                    self._cond.wait()
+            finally:
+                self._waiting -= 1
+            self._busy += 1
+            if self._idle:
+                return self._idle.pop()
+            self._live += 1
+
+        # Start the new worker outside the lock; spawning takes a moment
+        try:
+            return _Worker(self._context)
+        except Exception:
+            with self._cond:
+                self._live -= 1
+                self._busy -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, worker, reusable):
+        with self._cond:
+            self._busy -= 1
+            if reusable:
+                self._idle.append(worker)
+            else:
+                self._live -= 1
+            self._cond.notify()
+        if not reusable:
+            worker.stop()
+
+    def _wait_for_result(self, worker):
+        deadline = time.monotonic() + self.timeout_seconds
+        while not worker.conn.poll(_POLL_SECONDS):
+            if time.monotonic() > deadline:
+                self._count("_timeouts")
+                worker.kill()
+                raise PDFExtractionError(f"PDF took longer than {self.timeout_seconds:g}s to read.")
+            rss = worker.rss_bytes()
+            if self.max_rss_bytes and rss and rss > self.max_rss_bytes:
+                self._count("_memory_kills")
+                worker.kill()
+                raise PDFExtractionError(f"PDF needed more than {self.max_rss_bytes // (1024 * 1024)}MB to read.")
+        try:
+            return worker.conn.recv()
+        except (EOFError, OSError):
+            self._count("_crashes")
+            raise PDFExtractionError("The PDF reader crashed on this file.")
+
+    def _count(self, counter):
+        with self._cond:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def extract(self, data: bytes, max_pages=None, time_budget=None) -> str:
+        """Text of the PDF in `data`, same as read_pdf_text. Raises PDFExtractionError on any failure."""
+        if self.workers <= 0:
+            return read_pdf_text(io.BytesIO(data), max_pages, time_budget)
+
+        worker = self._acquire()
+        start = time.perf_counter()
+        reusable = False
+        ok = False
+        try:
+            try:
+                worker.conn.send((data, max_pages, time_budget))
+            except OSError:
+                self._count("_crashes")
+                raise PDFExtractionError("The PDF reader crashed on this file.")
+            status, payload = self._wait_for_result(worker)
+            worker.jobs += 1
+            rss = worker.rss_bytes()
+            reusable = worker.jobs < self.max_jobs_per_worker and not (self.max_rss_bytes and rss and rss > self.max_rss_bytes)
+            if not reusable:
+                self._count("_recycled")
+            if status != "ok":
+                raise PDFExtractionError(payload)
+            ok = True
+            return payload
+        finally:
+            with self._cond:
+                self._jobs += 1
+                self._errors += 0 if ok else 1
+                self._total_seconds += time.perf_counter() - start
+            self._release(worker, reusable)
+
+    def shutdown(self):
+        """Stops the idle workers (called on app shutdown)."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._live -= len(idle)
+        for worker in idle:
+            worker.stop()
+        self._threads.shutdown(wait=False)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "live_workers": self._live,
+                "busy_workers": self._busy,
+                "queue_depth": self._waiting,
+                "max_queue_depth": self._max_waiting,
+                "jobs": self._jobs,
+                "errors": self._errors,
+                "timeouts": self._timeouts,
+                "memory_kills": self._memory_kills,
+                "crashes": self._crashes,
+                "recycled": self._recycled,
+                "avg_ms": round(self._total_seconds / self._jobs * 1000, 1) if self._jobs else 0.0,
+            }
+
+
+pdf_pool = PDFWorkerPool(
+    PDF_POOL_WORKERS,
+    PDF_POOL_TIMEOUT_SECONDS,
+    PDF_POOL_MAX_JOBS_PER_WORKER,
+    PDF_POOL_MAX_RSS_MB,
+    PDF_POOL_MAX_QUEUE,
+    PDF_POOL_START_METHOD,
+)
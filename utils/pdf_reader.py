@@ -1,4 +1,59 @@
-import pdfplumber
+import os
+import time
+
+from utils.telemetry import traced
+
+# Limits for a single uploaded document (override in .env)
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "30"))
+PDF_TIME_BUDGET_SECONDS = float(os.getenv("PDF_TIME_BUDGET_SECONDS", "15"))
+
+
+class PDFExtractionError(Exception):
+    """Raised when a PDF cannot be read within the configured limits."""
+
+
+def iter_pdf_pages(source, max_pages=None, time_budget=None):
+    """
+    Lazily yields the text of each page that has any.
+    Stops after max_pages and raises PDFExtractionError once the time budget is spent.
+    """
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    time_budget = PDF_TIME_BUDGET_SECONDS if time_budget is None else time_budget
+    deadline = time.monotonic() + time_budget
+
+    # Imported here: pdfplumber (and pdfminer) are heavy and only needed once a PDF arrives
+    import pdfplumber
+
+    with pdfplumber.open(source) as pdf:
+        for index, page in enumerate(pdf.pages):
+            if index >= max_pages:
+                break
+            if time.monotonic() > deadline:
+                raise PDFExtractionError(f"PDF took longer than {time_budget:g}s to read.")
+
+            extracted = page.extract_text()
+            # Drop the parsed layout objects so memory doesn't grow with page count
+            page.close()
+            if extracted:
+                yield extracted
+
+
+def read_pdf_text(source, max_pages=None, time_budget=None):
+    """Extracts the full text of a PDF, one line break after every page."""
+    # Join once at the end instead of growing a string page by page
+    return "".join(f"{page}\n" for page in iter_pdf_pages(source, max_pages, time_budget))
+
+
+@traced("pdf.extract")
+def extract_pdf_bytes(data: bytes, max_pages=None, time_budget=None):
+    """
+    Text of an in-memory PDF, parsed in the PDF worker pool (utils/pdf_pool.py)
+    with a hard timeout and memory cap. Use this for anything a user uploaded.
+    """
+    from utils.pdf_pool import pdf_pool
+
+    return pdf_pool.extract(data, max_pages, time_budget)
+
 
 def extract_text_from_pdf(file):
     """
@@ -10,18 +65,13 @@ def extract_text_from_pdf(file):
             return "Error: Uploaded file is not a standard PDF."
 
         # 2. Extract Text
-        text = ""
-        with pdfplumber.open(file) as pdf:
-            for page in pdf.pages:
-                extracted = page.extract_text()
-                if extracted:
-                    text += extracted + "\n"
-        
+        text = extract_pdf_bytes(file.getvalue())
+
         # 3. Check for Empty PDFs (Scanned images or corrupted files)
         if not text.strip():
             return "Error: No text found. This PDF might be an image or scanned document."
-            
+
         return text
 
     except Exception as e:
-        return f"Error reading PDF: {str(e)}"
\ No newline at end of file
+        return f"Error reading PDF: {str(e)}"
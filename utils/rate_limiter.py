@@ -0,0 +1,164 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# One token bucket per caller, measured in estimated Gemini tokens rather than requests.
+# The bucket holds at most RATE_LIMIT_BURST_TOKENS and refills at RATE_LIMIT_TOKENS_PER_MINUTE.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() != "false"
+RATE_LIMIT_TOKENS_PER_MINUTE = float(os.getenv("RATE_LIMIT_TOKENS_PER_MINUTE", "12000"))
+RATE_LIMIT_BURST_TOKENS = float(os.getenv("RATE_LIMIT_BURST_TOKENS", "20000"))
+# State lives outside the process so every uvicorn worker draws from the same buckets:
+# a SQLite file shared by the workers on one host, or Redis (or anything speaking its protocol) across hosts
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+RATE_LIMIT_DB = os.getenv("RATE_LIMIT_DB", os.path.join(tempfile.gettempdir(), "career-coach-ratelimit.db"))
+
+# Estimated Gemini tokens (prompt + answer) per call of each endpoint
+ENDPOINT_COSTS = {
+    "evaluate-candidate": 3000,
+    "github-profile": 2500,
+    "cover-letter": 2500,
+    "study-plan": 1500,
+    "interview-prep": 1500,
+    "dsa-question": 1000,
+    "dsa-evaluate": 1500,
+    "dsa-hint": 400,
+    "rewrite": 300,  # per bullet point, so /api/rewrite/batch pays for each one
+}
+
+
+class SQLiteBuckets:
+    """Token buckets in a SQLite file. BEGIN IMMEDIATE makes each take atomic across processes."""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        # Takes are serialized by the lock anyway, so one thread of our own is enough; it keeps
+        # them from queuing behind PDF waits or anything else on asyncio's default executor
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="rate-limiter")
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # With WAL this only risks the last few takes on power loss, and saves an fsync per request
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)")
+
+    def _take(self, key, cost, capacity, rate):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens = capacity if row is None else min(capacity, row[0] + max(0.0, now - row[1]) * rate)
+                allowed = tokens >= cost
+                if allowed:
+                    tokens -= cost
+                self._conn.execute(
+                    "INSERT INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                    (key, tokens, now),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+    async def take(self, key, cost, capacity, rate):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._take, key, cost, capacity, rate)
+
+
+# Refill and take in one atomic step on the Redis server, using the server's clock
+_REDIS_TAKE = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local capacity, rate, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBuckets:
+    """Token buckets in Redis (or Valkey, KeyDB, Dragonfly...) for workers spread over several hosts."""
+
+    def __init__(self, url):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(_REDIS_TAKE)
+
+    async def take(self, key, cost, capacity, rate):
+        allowed, tokens = await self._script(keys=[f"ratelimit:{key}"], args=[capacity, rate, cost])
+        allowed = bool(int(allowed))
+        return allowed, 0.0 if allowed else (cost - float(tokens)) / rate
+
+
+class RateLimiter:
+    """
+    Cost-weighted token buckets shared by all workers. If the backend itself fails the request
+    is let through (and counted), so a broken limiter never takes the API down with it.
+    """
+
+    def __init__(self, backend, tokens_per_minute, burst_tokens, enabled=True):
+        self.backend = backend
+        self.rate = tokens_per_minute / 60
+        self.capacity = burst_tokens
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def _count(self, endpoint, field, amount=1):
+        with self._lock:
+            counters = self._endpoints.setdefault(endpoint, {"allowed": 0, "limited": 0, "tokens_charged": 0, "backend_errors": 0})
+            counters[field] += amount
+
+    async def take(self, key, endpoint, cost):
+        """(allowed, retry_after_seconds) for charging `cost` tokens to `key`."""
+        if not self.enabled:
+            return True, 0.0
+        # A request costing more than the whole bucket could never pass; charge it a full bucket instead
+        cost = min(cost, self.capacity)
+        try:
+            allowed, retry_after = await self.backend.take(key, cost, self.capacity, self.rate)
+        except Exception as e:
+            print(f"Rate limiter warning: backend unavailable, allowing request. {e}")
+            self._count(endpoint, "backend_errors")
+            return True, 0.0
+
+        if allowed:
+            self._count(endpoint, "allowed")
+            self._count(endpoint, "tokens_charged", cost)
+        else:
+            self._count(endpoint, "limited")
+        return allowed, retry_after
+
+    def stats(self):
+        with self._lock:
+            endpoints = {name: dict(counters) for name, counters in self._endpoints.items()}
+        return {
+            "backend": type(self.backend).__name__,
+            "tokens_per_minute": self.rate * 60,
+            "burst_tokens": self.capacity,
+            "endpoints": endpoints,
+        }
+
+
+def _make_backend():
+    if RATE_LIMIT_REDIS_URL:
+        return RedisBuckets(RATE_LIMIT_REDIS_URL)
+    return SQLiteBuckets(RATE_LIMIT_DB)
+
+
+rate_limiter = RateLimiter(_make_backend(), RATE_LIMIT_TOKENS_PER_MINUTE, RATE_LIMIT_BURST_TOKENS, RATE_LIMIT_ENABLED)
@@ -0,0 +1,46 @@
+import hashlib
+import json
+import os
+
+from utils.cache import LRUCache
+from utils.pdf_generator import REPORT_TEMPLATE_VERSION, render_report
+
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+REPORT_CACHE_TTL_SECONDS = float(os.getenv("REPORT_CACHE_TTL_SECONDS", "3600"))
+
+# key -> rendered PDF bytes
+report_cache = LRUCache(REPORT_CACHE_MAX_BYTES, REPORT_CACHE_TTL_SECONDS, len)
+
+
+def report_key(eval_data: dict, renderer: str) -> str:
+    """
+    Hash of the canonical JSON of eval_data (sorted keys, no whitespace) plus the renderer
+    and template version. The same evaluation always gets the same key, whatever the key order.
+    """
+    canonical = json.dumps(
+        {"data": eval_data, "renderer": renderer, "version": REPORT_TEMPLATE_VERSION},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def etag_for(key: str) -> str:
+    return f'"{key}"'
+
+
+def etag_matches(if_none_match, etag: str) -> bool:
+    """True if an If-None-Match header covers `etag` (handles lists, weak tags and *)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def get_report(eval_data: dict, renderer: str = "fpdf", key: str = None) -> bytes:
+    """Rendered PDF bytes, from the cache when this exact evaluation was rendered before."""
+    key = key or report_key(eval_data, renderer)
+    pdf_bytes = report_cache.get(key)
+    if pdf_bytes is None:
+        pdf_bytes = render_report(eval_data, renderer)
+        report_cache.set(key, pdf_bytes)
+    return pdf_bytes
@@ -0,0 +1,329 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from utils.http_client import get_http_client
+from utils.metrics import LatencyHistogram
+from utils.telemetry import upstream
+
+# "supabase" talks to PostgREST over the shared httpx pool; "sqlite" is a local file for tests and benchmarks
+DB_BACKEND = os.getenv("DB_BACKEND", "supabase")
+DB_SQLITE_PATH = os.getenv("DB_SQLITE_PATH", "local.db")
+DB_TIMEOUT_SECONDS = float(os.getenv("DB_TIMEOUT_SECONDS", "5"))
+
+# Latency of every repository call, per "table.operation"
+db_latency = LatencyHistogram()
+
+_COLUMN_NAME = re.compile(r"^\w+$")
+
+
+class RepositoryError(Exception):
+    """Raised when a database call fails or times out."""
+
+
+def _check_column(name):
+    if not _COLUMN_NAME.match(name):
+        raise ValueError(f"Invalid column name: {name!r}")
+    return name
+
+
+class PostgrestBackend:
+    """One Supabase table, reached through its PostgREST endpoint with the pooled async client."""
+
+    upstream = "supabase"
+
+    def __init__(self, table, url=None, key=None, timeout=None):
+        self.table = table
+        self.url = (url or os.getenv("SUPABASE_URL", "")).rstrip("/") + f"/rest/v1/{table}"
+        key = key or os.getenv("SUPABASE_KEY", "")
+        self.headers = {"apikey": key, "Authorization": f"Bearer {key}", "Prefer": "return=representation"}
+        self.timeout = timeout or DB_TIMEOUT_SECONDS
+
+    @staticmethod
+    def _filters(filters):
+        return {_check_column(column): f"eq.{value}" for column, value in (filters or {}).items()}
+
+    async def _request(self, method, params=None, body=None, extra_headers=None):
+        import httpx
+
+        try:
+            response = await get_http_client().request(
+                method, self.url, params=params, json=body,
+                headers={**self.headers, **(extra_headers or {})}, timeout=self.timeout,
+            )
+        except httpx.TimeoutException:
+            raise RepositoryError(f"{self.table}: database call timed out after {self.timeout:g}s")
+        except httpx.HTTPError as e:
+            raise RepositoryError(f"{self.table}: {e}")
+
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("message", response.text)
+            except ValueError:
+                message = response.text
+            raise RepositoryError(f"{self.table}: {message}")
+        return response.json() if response.content else []
+
+    async def insert(self, rows):
+        return await self._request("POST", body=rows)
+
+    async def upsert(self, rows, on_conflict="id"):
+        return await self._request(
+            "POST", params={"on_conflict": _check_column(on_conflict)}, body=rows,
+            extra_headers={"Prefer": "resolution=merge-duplicates,return=representation"},
+        )
+
+    async def select(self, filters=None, order_by=None, descending=False, columns="*"):
+        params = {"select": columns, **self._filters(filters)}
+        if order_by:
+            params["order"] = f"{_check_column(order_by)}.{'desc' if descending else 'asc'}"
+        return await self._request("GET", params=params)
+
+    async def select_page(self, filters, limit, after=None, columns="*"):
+        """Newest first, keyset-paginated on (created_at, id); `after` is the last row of the previous page."""
+        params = {"select": columns, **self._filters(filters), "order": "created_at.desc,id.desc", "limit": str(limit)}
+        if after:
+            created_at, row_id = after
+            params["or"] = f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{row_id}"))'
+        return await self._request("GET", params=params)
+
+    async def update(self, filters, values):
+        return await self._request("PATCH", params=self._filters(filters), body=values)
+
+
+class SQLiteBackend:
+    """
+    Same interface as PostgrestBackend on a local SQLite file, for tests and load benchmarks.
+    Each table stores id, created_at and the rest of the row as JSON.
+    """
+
+    upstream = "sqlite"
+
+    def __init__(self, table, path=None):
+        self.table = _check_column(table)
+        self._conn = sqlite3.connect(path or DB_SQLITE_PATH, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} (id TEXT PRIMARY KEY, created_at TEXT NOT NULL, data TEXT NOT NULL)"
+            )
+
+    @staticmethod
+    def _expr(column):
+        column = _check_column(column)
+        return column if column in ("id", "created_at") else f"json_extract(data, '$.{column}')"
+
+    @staticmethod
+    def _row(row_id, created_at, data):
+        return {"id": row_id, "created_at": created_at, **json.loads(data)}
+
+    def _where(self, filters):
+        if not filters:
+            return "", []
+        clauses = [f"{self._expr(column)} = ?" for column in filters]
+        return " WHERE " + " AND ".join(clauses), list(filters.values())
+
+    def _split(self, row):
+        row = dict(row)
+        row_id = str(row.pop("id", None) or uuid.uuid4())
+        created_at = row.pop("created_at", None) or datetime.now(timezone.utc).isoformat()
+        return row_id, created_at, row
+
+    def _insert(self, rows, replace):
+        rows = rows if isinstance(rows, list) else [rows]
+        stored = [self._split(row) for row in rows]
+        verb = "INSERT OR REPLACE" if replace else "INSERT"
+        with self._lock, self._conn:
+            if replace:
+                # Merge into the existing row, like PostgREST's merge-duplicates
+                merged = []
+                for row_id, created_at, data in stored:
+                    existing = self._conn.execute(f"SELECT created_at, data FROM {self.table} WHERE id = ?", (row_id,)).fetchone()
+                    if existing:
+                        created_at, data = existing[0], {**json.loads(existing[1]), **data}
+                    merged.append((row_id, created_at, data))
+                stored = merged
+            self._conn.executemany(
+                f"{verb} INTO {self.table} (id, created_at, data) VALUES (?, ?, ?)",
+                [(row_id, created_at, json.dumps(data)) for row_id, created_at, data in stored],
+            )
+        return [{"id": row_id, "created_at": created_at, **data} for row_id, created_at, data in stored]
+
+    @staticmethod
+    def _project(rows, columns):
+        if columns == "*":
+            return rows
+        wanted = [column.strip() for column in columns.split(",")]
+        return [{column: row.get(column) for column in wanted} for row in rows]
+
+    def _select(self, filters, order_by, descending, columns):
+        where, args = self._where(filters)
+        sql = f"SELECT id, created_at, data FROM {self.table}{where}"
+        if order_by:
+            sql += f" ORDER BY {self._expr(order_by)} {'DESC' if descending else 'ASC'}"
+        with self._lock:
+            rows = [self._row(*row) for row in self._conn.execute(sql, args)]
+        return self._project(rows, columns)
+
+    def _select_page(self, filters, limit, after, columns):
+        where, args = self._where(filters)
+        if after:
+            where += (" AND " if where else " WHERE ") + "(created_at < ? OR (created_at = ? AND id < ?))"
+            args += [after[0], after[0], after[1]]
+        sql = f"SELECT id, created_at, data FROM {self.table}{where} ORDER BY created_at DESC, id DESC LIMIT ?"
+        with self._lock:
+            rows = [self._row(*row) for row in self._conn.execute(sql, args + [limit])]
+        return self._project(rows, columns)
+
+    def _update(self, filters, values):
+        where, args = self._where(filters)
+        with self._lock, self._conn:
+            rows = [self._row(*row) for row in self._conn.execute(f"SELECT id, created_at, data FROM {self.table}{where}", args)]
+            for row in rows:
+                row.update(values)
+                data = {k: v for k, v in row.items() if k not in ("id", "created_at")}
+                self._conn.execute(f"UPDATE {self.table} SET data = ? WHERE id = ?", (json.dumps(data), row["id"]))
+        return rows
+
+    async def insert(self, rows):
+        return await asyncio.to_thread(self._insert, rows, False)
+
+    async def upsert(self, rows, on_conflict="id"):
+        if on_conflict != "id":
+            raise ValueError("The SQLite backend only upserts on id.")
+        return await asyncio.to_thread(self._insert, rows, True)
+
+    async def select(self, filters=None, order_by=None, descending=False, columns="*"):
+        return await asyncio.to_thread(self._select, filters, order_by, descending, columns)
+
+    async def select_page(self, filters, limit, after=None, columns="*"):
+        return await asyncio.to_thread(self._select_page, filters, limit, after, columns)
+
+    async def update(self, filters, values):
+        return await asyncio.to_thread(self._update, filters, values)
+
+
+class Repository:
+    """Base for the per-table repositories: times every call into db_latency."""
+
+    table = None
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def _call(self, operation, method, *args, **kwargs):
+        start = time.perf_counter()
+        ok = False
+        try:
+            with upstream(self.backend.upstream):
+                result = await getattr(self.backend, method)(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            db_latency.observe(f"{self.table}.{operation}", time.perf_counter() - start, ok)
+
+
+class ApplicationsRepository(Repository):
+    table = "job_applications"
+
+    async def create(self, user_id, company_name, job_title, match_score, status="Saved"):
+        return await self._call("create", "insert", {
+            "user_id": user_id,
+            "company_name": company_name,
+            "job_title": job_title,
+            "match_score": match_score,
+            "status": status,
+        })
+
+    async def page_for_user(self, user_id, limit, after=None, columns="*"):
+        return await self._call("page", "select_page", {"user_id": user_id}, limit, after, columns)
+
+    async def update_status(self, app_id, user_id, status):
+        return await self._call("update", "update", {"id": app_id, "user_id": user_id}, {"status": status})
+
+
+class HistoryRepository(Repository):
+    table = "resume_history"
+
+    async def add(self, row):
+        return await self._call("insert", "insert", row)
+
+    async def add_many(self, rows):
+        return await self._call("insert_many", "insert", list(rows))
+
+    async def page_for_email(self, email, limit, after=None, columns="*"):
+        return await self._call("page", "select_page", {"user_email": email}, limit, after, columns)
+
+
+class EvaluationsRepository(Repository):
+    table = "evaluations"
+
+    async def add(self, row):
+        return await self._call("insert", "insert", row)
+
+    async def add_many(self, rows):
+        return await self._call("insert_many", "insert", list(rows))
+
+
+class ProfilesRepository(Repository):
+    table = "profiles"
+
+    async def upsert(self, profile):
+        return await self._call("upsert", "upsert", profile)
+
+    async def get(self, user_id):
+        rows = await self._call("get", "select", {"id": user_id})
+        return rows[0] if rows else None
+
+
+class JobDescriptionsRepository(Repository):
+    """
+    Registered JD texts by jd_id, so any worker can rebuild a profile another one registered.
+    On Supabase the table comes from supabase/migrations/20261018000000_create_job_descriptions.sql.
+    """
+
+    table = "job_descriptions"
+
+    async def save(self, jd_id, text):
+        return await self._call("upsert", "upsert", {"id": jd_id, "job_description": text})
+
+    async def get_text(self, jd_id):
+        rows = await self._call("get", "select", {"id": jd_id}, columns="id,job_description")
+        return rows[0]["job_description"] if rows else None
+
+
+applications = history = evaluations = profiles = job_descriptions = None
+active_backend = None
+
+
+def configure(backend=None, sqlite_path=None):
+    """
+    (Re)builds the module-level repositories. Handlers look them up on this module,
+    so tests and benchmarks can switch to SQLite with configure("sqlite", ":memory:").
+    """
+    global applications, history, evaluations, profiles, job_descriptions, active_backend
+    backend = backend or DB_BACKEND
+
+    if backend == "sqlite":
+        path = sqlite_path or DB_SQLITE_PATH
+        make = lambda table: SQLiteBackend(table, path)
+    elif backend == "supabase":
+        make = PostgrestBackend
+    else:
+        raise ValueError(f"Unknown DB_BACKEND '{backend}'. Use supabase or sqlite.")
+
+    applications = ApplicationsRepository(make(ApplicationsRepository.table))
+    history = HistoryRepository(make(HistoryRepository.table))
+    evaluations = EvaluationsRepository(make(EvaluationsRepository.table))
+    profiles = ProfilesRepository(make(ProfilesRepository.table))
+    job_descriptions = JobDescriptionsRepository(make(JobDescriptionsRepository.table))
+    active_backend = backend
+
+
+configure()
@@ -0,0 +1,166 @@
+import contextvars
+import gzip
+import json
+import os
+
+from fastapi.responses import JSONResponse
+
+# orjson serializes several times faster than the stdlib; brotli and msgpack are optional extras.
+# Anything missing just falls back (stdlib json, gzip only, JSON instead of MessagePack).
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Bodies smaller than this aren't worth compressing
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+# Already compressed, or streamed and must reach the client chunk by chunk
+_SKIP_COMPRESSION = ("application/pdf", "image/", "text/event-stream", "application/x-ndjson", "application/zip")
+
+# Set per request by ResponseEncodingMiddleware when the client asked for MessagePack
+_wants_msgpack = contextvars.ContextVar("wants_msgpack", default=False)
+
+
+def dumps(content) -> bytes:
+    """Compact UTF-8 JSON, with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _msgpack():
+    try:
+        import msgpack
+        return msgpack
+    except ImportError:
+        return None
+
+
+def _brotli():
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+
+class FastJSONResponse(JSONResponse):
+    """The app's default response class: orjson bodies, or MessagePack when the client sent Accept: application/msgpack."""
+
+    def render(self, content) -> bytes:
+        if _wants_msgpack.get():
+            msgpack = _msgpack()
+            if msgpack is not None:
+                self.media_type = MSGPACK_TYPES[0]
+                return msgpack.packb(content, use_bin_type=True)
+        return dumps(content)
+
+
+def choose_encoding(accept_encoding: str):
+    """br if the client takes it and brotli is installed, else gzip, else None."""
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            offered[name] = quality
+    if offered.get("br", 0) > 0 and _brotli() is not None:
+        return "br"
+    if offered.get("gzip", 0) > 0 or offered.get("*", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return _brotli().compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class ResponseEncodingMiddleware:
+    """
+    Pure ASGI middleware: compresses complete responses above COMPRESS_MIN_BYTES with the best
+    encoding the client accepts, and flags MessagePack requests for FastJSONResponse.
+    Streaming responses (SSE, NDJSON) pass through untouched so every chunk is flushed at once.
+    """
+
+    def __init__(self, app, min_bytes=None):
+        self.app = app
+        self.min_bytes = COMPRESS_MIN_BYTES if min_bytes is None else min_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        token = _wants_msgpack.set(any(kind in headers.get("accept", "") for kind in MSGPACK_TYPES))
+        encoding = choose_encoding(headers.get("accept-encoding", ""))
+        try:
+            if encoding is None:
+                return await self.app(scope, receive, send)
+            await self.app(scope, receive, _CompressingSend(send, encoding, self.min_bytes))
+        finally:
+            _wants_msgpack.reset(token)
+
+
+class _CompressingSend:
+    def __init__(self, send, encoding, min_bytes):
+        self.send = send
+        self.encoding = encoding
+        self.min_bytes = min_bytes
+        self.start = None
+        self.passthrough = False
+
+    async def __call__(self, message):
+        if self.passthrough:
+            return await self.send(message)
+
+        if message["type"] == "http.response.start":
+            # Hold the headers until we see the body and know whether to compress
+            self.start = message
+            return
+
+        if message["type"] != "http.response.body":
+            return await self.send(message)
+
+        headers = [(k.lower(), v) for k, v in self.start["headers"]]
+        content_type = next((v.decode("latin-1") for k, v in headers if k == b"content-type"), "")
+        already_encoded = any(k == b"content-encoding" for k, _ in headers)
+        body = message.get("body", b"")
+
+        if (message.get("more_body") or already_encoded or len(body) < self.min_bytes
+                or content_type.startswith(_SKIP_COMPRESSION)):
+            self.passthrough = True
+            await self.send(self.start)
+            return await self.send(message)
+
+        compressed = compress(body, self.encoding)
+        headers = []
+        vary = b"Accept-Encoding"
+        for key, value in self.start["headers"]:
+            key = key.lower()
+            if key == b"content-length":
+                continue
+            if key == b"vary":
+                vary = value + b", Accept-Encoding"
+                continue
+            if key == b"etag" and not value.startswith(b"W/"):
+                # The compressed bytes differ from the identity ones, so the tag becomes weak
+                value = b"W/" + value
+            headers.append((key, value))
+        headers += [
+            (b"content-encoding", self.encoding.encode()),
+            (b"content-length", str(len(compressed)).encode()),
+            (b"vary", vary),
+        ]
+        await self.send({**self.start, "headers": headers})
+        await self.send({"type": "http.response.body", "body": compressed})
@@ -0,0 +1,54 @@
+import hashlib
+import os
+
+from utils.ats_matcher import extract_skills_from_text
+from utils.cache import LRUCache, text_size
+from utils.pdf_pool import pdf_pool
+from utils.pdf_reader import extract_pdf_bytes
+from utils.telemetry import traced
+from utils.text_cleaner import clean_text
+
+RESUME_CACHE_MAX_BYTES = int(os.getenv("RESUME_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+RESUME_CACHE_TTL_SECONDS = float(os.getenv("RESUME_CACHE_TTL_SECONDS", "3600"))
+
+
+def _resume_size(parsed):
+    return text_size(parsed["raw_text"], parsed["cleaned_text"], *parsed["skills"])
+
+
+# Keyed by the SHA-256 of the uploaded file, so the same PDF is parsed once
+# no matter which endpoint it is uploaded to
+resume_cache = LRUCache(RESUME_CACHE_MAX_BYTES, RESUME_CACHE_TTL_SECONDS, _resume_size)
+
+
+@traced("resume.parse")
+def parse_resume(data: bytes) -> dict:
+    """
+    Returns the raw text, cleaned text and skill set of a PDF resume.
+    Repeat uploads of the same bytes are served from the cache without parsing.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    parsed = resume_cache.get(digest)
+    if parsed is not None:
+        return parsed
+
+    raw_text = extract_pdf_bytes(data)
+    cleaned_text = clean_text(raw_text)
+    parsed = {
+        "sha256": digest,
+        "raw_text": raw_text,
+        "cleaned_text": cleaned_text,
+        # frozenset: the cached entry is shared between requests
+        "skills": frozenset(extract_skills_from_text(cleaned_text)),
+    }
+    resume_cache.set(digest, parsed)
+    return parsed
+
+
+async def parse_resume_async(data: bytes) -> dict:
+    """
+    The API's one entry point for uploaded PDFs. Runs parse_resume on the PDF pool's threads (not
+    asyncio's default executor, which to_thread callers share), so hashing and waiting on the pool
+    stay off the event loop.
+    """
+    return await pdf_pool.run(parse_resume, data)
@@ -1,12 +1,14 @@
-from google import genai
 import streamlit as st
 
+from utils import llm_gateway
+
 def ask_resume_question(resume_text, question):
     """
     Answers a specific question about the resume text.
     """
     try:
-        client = genai.Client(api_key=st.secrets["GOOGLE_API_KEY"])
+        if not llm_gateway.is_configured():
+            llm_gateway.configure(st.secrets["GOOGLE_API_KEY"])
 
         prompt = f"""
         You are an intelligent assistant helping a recruiter analyze a resume.
@@ -23,11 +25,7 @@ def ask_resume_question(resume_text, question):
         3. Be concise and professional.
         """
 
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt,
-        )
-        return response.text
+        return llm_gateway.generate(prompt)
 
     except Exception as e:
         return f"Error processing question: {str(e)}"
\ No newline at end of file
@@ -1,38 +1,64 @@
 import os
-from dotenv import load_dotenv
-from google import genai
+from concurrent.futures import ThreadPoolExecutor
 
-# 1. Load environment variables from .env
-load_dotenv()
+from utils.llm_cache import cached_llm, normalize_text
+from utils.llm_gateway import generate
 
-# 2. Configure Gemini using the key from .env (Do this globally, outside the function)
-client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+# Bump when the prompt below changes so cached rewrites are not reused
+REWRITE_PROMPT_VERSION = 1
+# How many bullets of one batch are sent to Gemini at the same time
+REWRITE_BATCH_CONCURRENCY = int(os.getenv("REWRITE_BATCH_CONCURRENCY", "5"))
+
+@cached_llm("rewrite", REWRITE_PROMPT_VERSION, normalize_text)
+def _rewrite_bullet(bullet_text):
+    prompt = f"""
+    You are a Professional Resume Editor.
+    I will give you a "Weak" resume bullet point.
+
+    Your Goal: Rewrite it into 3 different "Strong" versions using active voice and metrics.
+
+    WEAK BULLET: "{bullet_text}"
+
+    RULES:
+    1. Use "Action Verbs" (e.g., Engineered, Spearheaded, Optimized).
+    2. If no numbers are provided, add placeholders like [X%] or [Y hours] for the user to fill in.
+    3. Make it sound professional but realistic.
+    4. Output format: Just the 3 options, numbered.
+    """
+    return generate(prompt)
 
 def optimize_bullet_point(bullet_text):
     """Rewrites a resume bullet point to follow the XYZ formula."""
     try:
-        prompt = f"""
-        You are a Professional Resume Editor.
-        I will give you a "Weak" resume bullet point.
+        return _rewrite_bullet(bullet_text)
 
-        Your Goal: Rewrite it into 3 different "Strong" versions using active voice and metrics.
-
-        WEAK BULLET: "{bullet_text}"
+    except Exception as e:
+        return f"Error optimizing text: {str(e)}"
 
-        RULES:
-        1. Use "Action Verbs" (e.g., Engineered, Spearheaded, Optimized).
-        2. If no numbers are provided, add placeholders like [X%] or [Y hours] for the user to fill in.
-        3. Make it sound professional but realistic.
-        4. Output format: Just the 3 options, numbered.
-        """
+def optimize_bullet_points(bullet_points):
+    """
+    Rewrites a whole list of bullets. Identical bullets are sent to Gemini once and the
+    rest run with bounded concurrency. Returns one result per input, in order; a failed
+    bullet gets status "error" without failing the others.
+    """
+    # normalized text -> first bullet written that way
+    unique = {}
+    for bullet in bullet_points:
+        if bullet.strip():
+            unique.setdefault(normalize_text(bullet), bullet)
 
-        # New SDK syntax for generating content
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt
-        )
-        
-        return response.text
+    outcomes = {}
+    if unique:
+        with ThreadPoolExecutor(max_workers=min(REWRITE_BATCH_CONCURRENCY, len(unique))) as pool:
+            futures = {key: pool.submit(_rewrite_bullet, bullet) for key, bullet in unique.items()}
+            for key, future in futures.items():
+                try:
+                    outcomes[key] = {"status": "success", "improved": future.result()}
+                except Exception as e:
+                    outcomes[key] = {"status": "error", "message": f"Error optimizing text: {str(e)}"}
 
-    except Exception as e:
-        return f"Error optimizing text: {str(e)}"
\ No newline at end of file
+    results = []
+    for bullet in bullet_points:
+        outcome = outcomes.get(normalize_text(bullet), {"status": "error", "message": "Bullet point is empty."})
+        results.append({"original": bullet, **outcome})
+    return results
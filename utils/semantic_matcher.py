@@ -1,16 +1,33 @@
+import json
+import os
 import re
+import threading
+
+from utils.telemetry import traced
+
+SCORING_MODES = ("jaccard", "tfidf", "bm25")
+# IDFTable saved with to_json from a reference corpus. Unset means IDF is fitted on each pool being ranked,
+# so scores shift with the pool's composition.
+IDF_TABLE_PATH = os.getenv("IDF_TABLE_PATH")
+
+_idf_table = None
+_idf_table_lock = threading.Lock()
+
+
+def tokenize(text):
+    return re.findall(r'\w+', str(text).lower())
+
 
 def calculate_semantic_match(resume_text: str, job_description: str) -> int:
     """
     A lightweight, pure-Python Jaccard Similarity algorithm to replace scikit-learn.
     """
-    def get_words(text):
-        words = re.findall(r'\w+', str(text).lower())
-        return set(words)
+    return semantic_match_from_words(set(tokenize(resume_text)), set(tokenize(job_description)))
 
-    resume_words = get_words(resume_text)
-    job_words = get_words(job_description)
 
+@traced("semantic.match")
+def semantic_match_from_words(resume_words: set, job_words: set) -> int:
+    """calculate_semantic_match on already tokenized word sets (e.g. a cached JD profile)."""
     if not job_words:
         return 0
 
@@ -19,5 +36,209 @@ def calculate_semantic_match(resume_text: str, job_description: str) -> int:
 
     score = (len(intersection) / len(union)) * 100 if union else 0
     adjusted_score = min(int(score * 1.5), 100)
-    
-    return adjusted_score
\ No newline at end of file
+
+    return adjusted_score
+
+
+# --- VECTORIZED SCORING ENGINE ---
+# numpy/scipy are imported inside the functions below so they don't slow down server boot.
+
+def _count_matrix(texts, vocabulary, grow):
+    """Sparse documents x terms matrix of raw counts. New terms are added to `vocabulary` only if grow=True."""
+    import numpy as np
+    from scipy import sparse
+
+    cols = []
+    lengths = []
+    for text in texts:
+        tokens = tokenize(text)
+        if grow:
+            for term in set(tokens).difference(vocabulary):
+                vocabulary[term] = len(vocabulary)
+            ids = list(map(vocabulary.__getitem__, tokens))
+        else:
+            ids = [col for col in map(vocabulary.get, tokens) if col is not None]
+        cols.extend(ids)
+        lengths.append(len(ids))
+
+    rows = np.repeat(np.arange(len(texts)), lengths)
+    # Repeated (row, col) pairs are summed, which turns token ids into term counts
+    counts = sparse.csr_matrix(
+        (np.ones(len(cols)), (rows, np.asarray(cols, dtype=np.int64))),
+        shape=(len(texts), len(vocabulary)),
+    )
+    counts.sum_duplicates()
+    return counts
+
+
+class IDFTable:
+    """
+    Document frequencies of every term in a reference corpus (e.g. a few thousand resumes and JDs).
+    Fit it once, save it with to_json, and reuse it so scores don't depend on the pool being ranked.
+    """
+
+    def __init__(self, vocabulary, document_frequency, num_documents, avg_doc_length):
+        import numpy as np
+
+        self.vocabulary = vocabulary
+        self.document_frequency = np.asarray(document_frequency, dtype=float)
+        self.num_documents = num_documents
+        self.avg_doc_length = avg_doc_length
+
+    @classmethod
+    def fit(cls, documents):
+        vocabulary = {}
+        return cls.from_counts(vocabulary, _count_matrix(documents, vocabulary, grow=True))
+
+    @classmethod
+    def from_counts(cls, vocabulary, counts):
+        import numpy as np
+
+        num_documents = counts.shape[0]
+        document_frequency = np.asarray((counts > 0).sum(axis=0)).ravel()
+        avg_doc_length = float(counts.sum()) / max(num_documents, 1)
+        return cls(vocabulary, document_frequency, num_documents, avg_doc_length)
+
+    def tfidf_weights(self):
+        import numpy as np
+
+        # Smoothed idf, as in scikit-learn's TfidfVectorizer
+        return np.log((1 + self.num_documents) / (1 + self.document_frequency)) + 1
+
+    def bm25_weights(self):
+        import numpy as np
+
+        n, df = self.num_documents, self.document_frequency
+        return np.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def to_json(self, path):
+        with open(path, "w") as f:
+            json.dump({
+                "vocabulary": self.vocabulary,
+                "document_frequency": self.document_frequency.tolist(),
+                "num_documents": self.num_documents,
+                "avg_doc_length": self.avg_doc_length,
+            }, f)
+
+    @classmethod
+    def from_json(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["vocabulary"], data["document_frequency"], data["num_documents"], data["avg_doc_length"])
+
+
+def get_idf_table():
+    """The IDFTable at IDF_TABLE_PATH, loaded once per process; None when no path is configured."""
+    global _idf_table
+    if IDF_TABLE_PATH is None:
+        return None
+    if _idf_table is None:
+        with _idf_table_lock:
+            if _idf_table is None:
+                _idf_table = IDFTable.from_json(IDF_TABLE_PATH)
+    return _idf_table
+
+
+def _l2_normalize(matrix):
+    import numpy as np
+    from scipy import sparse
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1 / norms) @ matrix
+
+
+def _column(matrix):
+    import numpy as np
+
+    return np.asarray(matrix.todense()).ravel()
+
+
+def _jaccard_scores(q, docs):
+    import numpy as np
+
+    q = (q > 0).astype(float)
+    docs = (docs > 0).astype(float)
+    intersection = _column(docs @ q.T)
+    union = np.asarray(docs.sum(axis=1)).ravel() + q.sum() - intersection
+    ratio = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+    # Same scaling as calculate_semantic_match, so both give identical numbers
+    return [min(int(r * 100 * 1.5), 100) for r in ratio]
+
+
+def _tfidf_scores(q, docs, idf_table):
+    weights = idf_table.tfidf_weights()
+    q = _l2_normalize(q.multiply(weights).tocsr())
+    docs = _l2_normalize(docs.multiply(weights).tocsr())
+    return [int(round(c * 100)) for c in _column(docs @ q.T)]
+
+
+def _bm25_scores(q, docs, idf_table, k1=1.5, b=0.75):
+    import numpy as np
+
+    docs = docs.tocsr(copy=True)
+    doc_lengths = np.asarray(docs.sum(axis=1)).ravel()
+    avg_length = idf_table.avg_doc_length or 1.0
+
+    # Saturate every stored term frequency at once: tf * (k1 + 1) / (tf + k1 * (1 - b + b * len / avg))
+    length_norm = np.repeat(k1 * (1 - b + b * doc_lengths / avg_length), np.diff(docs.indptr))
+    docs.data = docs.data * (k1 + 1) / (docs.data + length_norm)
+
+    q = (q > 0).astype(float).multiply(idf_table.bm25_weights())
+    return [round(float(s), 3) for s in _column(docs @ q.T)]
+
+
+def vectorize(texts, idf_table):
+    """
+    Term-count vectors (one sparse row per text) in the table's vocabulary; unknown words are dropped.
+    Vectorize a candidate pool once and re-rank it with score_vectors for every new query.
+    """
+    return _count_matrix(texts, idf_table.vocabulary, grow=False)
+
+
+def score_vectors(query_vector, document_matrix, mode, idf_table):
+    """Scores one vectorized text against a matrix of them: a single sparse matrix product."""
+    if mode not in SCORING_MODES:
+        raise ValueError(f"Unknown scoring mode '{mode}'. Use one of: {', '.join(SCORING_MODES)}.")
+    if document_matrix.shape[0] == 0:
+        return []
+    if mode == "jaccard":
+        return _jaccard_scores(query_vector, document_matrix)
+    if mode == "tfidf":
+        return _tfidf_scores(query_vector, document_matrix, idf_table)
+    return _bm25_scores(query_vector, document_matrix, idf_table)
+
+
+def score_many(query: str, documents: list, mode: str = "tfidf", idf_table=None) -> list:
+    """
+    Scores one text against many: one JD against a pool of resumes, or one resume
+    against many JDs. Returns one score per document, in order.
+
+    Modes:
+      jaccard - same 0-100 score as calculate_semantic_match
+      tfidf   - cosine similarity of TF-IDF vectors, 0-100
+      bm25    - Okapi BM25 relevance; unbounded, only comparable within one query
+    Without an idf_table, IDF is fitted on the query plus the documents being scored.
+    """
+    if mode not in SCORING_MODES:
+        raise ValueError(f"Unknown scoring mode '{mode}'. Use one of: {', '.join(SCORING_MODES)}.")
+    if not documents:
+        return []
+
+    # Row 0 is the query, the rest are the documents; every text is tokenized exactly once
+    texts = [query] + list(documents)
+    if mode == "jaccard" or idf_table is None:
+        # Jaccard always uses every word, like calculate_semantic_match
+        vocabulary = {}
+        counts = _count_matrix(texts, vocabulary, grow=True)
+        idf_table = IDFTable.from_counts(vocabulary, counts)
+    else:
+        counts = vectorize(texts, idf_table)
+
+    return score_vectors(counts[0], counts[1:], mode, idf_table)
+
+
+def rank_documents(query: str, documents: list, mode: str = "tfidf", idf_table=None) -> list:
+    """Indices and scores of `documents`, best match first."""
+    scores = score_many(query, documents, mode, idf_table)
+    return sorted(enumerate(scores), key=lambda pair: pair[1], reverse=True)
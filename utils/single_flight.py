@@ -0,0 +1,79 @@
+import asyncio
+import functools
+
+# Every SingleFlight registers itself here so the stats endpoint can list them all
+_flights = []
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight calls: while a call for `key` is running, later callers
+    await the same task instead of starting their own. Its result or exception goes to
+    every waiter. One waiter being cancelled doesn't cancel the call for the others; it is
+    only cancelled once nobody is left waiting for it. Nothing is kept after it finishes,
+    so this sits in front of the caches, not in place of them.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.abandoned = 0
+        _flights.append(self)
+
+    async def do(self, key, fn, *args):
+        """Await fn(*args), or the identical call already running under `key`."""
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = _Call(asyncio.ensure_future(fn(*args)))
+            call.task.add_done_callback(functools.partial(self._finished, key, call))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Every caller gave up; stop the call and don't let newcomers join a dying task
+                self._forget(key, call)
+                call.task.cancel()
+                self.abandoned += 1
+
+    def _forget(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def _finished(self, key, call, task):
+        self._forget(key, call)
+        # Reading the exception also keeps asyncio from warning about it when every waiter left
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def stats(self):
+        calls = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._calls),
+            "calls": calls,
+            "upstream_calls": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / calls, 4) if calls else 0.0,
+            "errors": self.errors,
+            "abandoned": self.abandoned,
+        }
+
+
+def single_flight_stats():
+    return {flight.name: flight.stats() for flight in _flights}
@@ -0,0 +1,161 @@
+import asyncio
+import contextlib
+import contextvars
+import functools
+import hmac
+import os
+import threading
+import time
+
+from utils.metrics import LatencyHistogram, counter_lines
+
+# Off by default: span() and traced functions then cost one flag check, and no Server-Timing header is sent
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+# /metrics and the /api/*-stats endpoints are only served while metrics are enabled; with a token set, callers must also send
+# "Authorization: Bearer <METRICS_TOKEN>" (set one whenever the API is reachable from the internet)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+# Longest Server-Timing header we send; spans past this are left out (the histograms still get them)
+SERVER_TIMING_MAX_SPANS = int(os.getenv("SERVER_TIMING_MAX_SPANS", "20"))
+
+# In-process stages (skill extraction, semantic match...) are often well under 5 ms
+SPAN_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+enabled = METRICS_ENABLED
+endpoint_latency = LatencyHistogram()  # (method, route template)
+span_latency = LatencyHistogram(SPAN_BUCKETS_MS)  # span name, e.g. "skills.extract"
+upstream_latency = LatencyHistogram()  # "github", "gemini", "supabase"...
+
+_status_lock = threading.Lock()
+_responses = {}  # (method, route, status) -> count
+
+# The spans of the request being handled. Tasks and worker threads started by the handler
+# inherit the context, so they append to the same list.
+_request_spans = contextvars.ContextVar("request_spans", default=None)
+_NOOP = contextlib.nullcontext()
+
+
+class _Span:
+    __slots__ = ("name", "histogram", "start")
+
+    def __init__(self, name, histogram):
+        self.name = name
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        self.histogram.observe(self.name, seconds, exc_type is None)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((self.name, seconds))
+        return False
+
+    # So it also fits in `async with` statements (nullcontext does too)
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+def span(name):
+    """`with span("pdf.extract"):` times a stage of the current request."""
+    return _Span(name, span_latency) if enabled else _NOOP
+
+
+def upstream(name):
+    """Like span(), for a call to an outside service (kept in its own histogram)."""
+    return _Span(name, upstream_latency) if enabled else _NOOP
+
+
+def traced(name):
+    """Decorator version of span() for sync and async functions."""
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not enabled:
+                    return await fn(*args, **kwargs)
+                with _Span(name, span_latency):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            with _Span(name, span_latency):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def scrape_authorized(authorization: str) -> bool:
+    """True if a request with this Authorization header may read /metrics and the stats endpoints (METRICS_TOKEN, when set)."""
+    if not METRICS_TOKEN:
+        return True
+    return hmac.compare_digest((authorization or "").encode("utf-8"), f"Bearer {METRICS_TOKEN}".encode("utf-8"))
+
+
+def server_timing(spans, app_seconds):
+    """Server-Timing value: one entry per span name (repeats summed), then the whole app."""
+    totals = {}
+    for name, seconds in spans:
+        totals[name] = totals.get(name, 0.0) + seconds
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in list(totals.items())[:SERVER_TIMING_MAX_SPANS]]
+    entries.append(f"app;dur={app_seconds * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class TelemetryMiddleware:
+    """
+    Pure ASGI middleware: times every request per route template and adds a Server-Timing
+    header built from the spans recorded while handling it. A no-op while metrics are disabled.
+    Streaming responses send their headers first, so only the spans done by then show up.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not enabled:
+            return await self.app(scope, receive, send)
+
+        spans = []
+        token = _request_spans.set(spans)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = server_timing(spans, time.perf_counter() - start)
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_spans.reset(token)
+            route = scope.get("route")
+            # Route templates ("/api/github/{username}") keep the label count bounded
+            key = (scope["method"], route.path if route is not None else "unmatched")
+            endpoint_latency.observe(key, time.perf_counter() - start, status < 500)
+            with _status_lock:
+                _responses[(*key, str(status))] = _responses.get((*key, str(status)), 0) + 1
+
+
+def prometheus_lines():
+    """Endpoint, span and upstream metrics in the Prometheus text format."""
+    with _status_lock:
+        responses = dict(_responses)
+    return [
+        *endpoint_latency.prometheus("http_request_duration_seconds", ("method", "route")),
+        *counter_lines("http_responses_total", ("method", "route", "status"), responses),
+        *span_latency.prometheus("span_duration_seconds", "span"),
+        *upstream_latency.prometheus("upstream_request_duration_seconds", "upstream"),
+    ]
@@ -0,0 +1,218 @@
+import asyncio
+import hashlib
+import os
+import time
+from typing import NamedTuple
+
+from utils.cache import LRUCache
+
+# Supabase signs access tokens with the project's JWT secret (HS256) or, on newer projects,
+# asymmetric keys published as a JWKS (e.g. <SUPABASE_URL>/auth/v1/.well-known/jwks.json).
+# Only what is configured explicitly is used: with neither, every token is checked remotely,
+# and a token whose key isn't in the JWKS (say, still HS256-signed) is checked remotely too.
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWKS_URL = os.getenv("SUPABASE_JWKS_URL")
+JWT_AUDIENCE = os.getenv("JWT_AUDIENCE", "authenticated")
+JWT_LEEWAY_SECONDS = int(os.getenv("JWT_LEEWAY_SECONDS", "30"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "300"))
+# Re-ask Supabase about a cached token this often, to catch sign-outs and bans (0 = never)
+AUTH_REMOTE_RECHECK_SECONDS = float(os.getenv("AUTH_REMOTE_RECHECK_SECONDS", "0"))
+
+_ASYMMETRIC_ALGORITHMS = ["RS256", "ES256", "EdDSA"]
+
+
+class InvalidToken(Exception):
+    """Raised when a bearer token is missing, malformed, expired or not for this project."""
+
+
+class AuthUnavailable(Exception):
+    """Raised when the token can't be checked right now (JWKS unreachable): a server problem, not a bad token."""
+
+
+class _KeyNotInJWKS(Exception):
+    """The JWKS has no key for this token; verify_token falls back to asking Supabase."""
+
+
+class AuthenticatedUser(NamedTuple):
+    """What handlers need from a verified token (same .id / .email as the Supabase user object)."""
+    id: str
+    email: str
+    role: str
+    claims: dict
+
+
+# sha256(token) -> {"user": AuthenticatedUser, "checked_at": monotonic time of the last remote check}
+verified_tokens = LRUCache(AUTH_CACHE_MAX_ENTRIES * 1024, AUTH_CACHE_TTL_SECONDS, lambda entry: 512, AUTH_CACHE_MAX_ENTRIES)
+_jwks_client = None
+
+
+def verification_mode():
+    if SUPABASE_JWT_SECRET:
+        return "secret"
+    if SUPABASE_JWKS_URL:
+        return "jwks"
+    return "remote"
+
+
+def _get_jwks_client():
+    global _jwks_client
+    if _jwks_client is None:
+        import jwt
+
+        # Keys are cached inside the client, so the JWKS is fetched once an hour at most
+        _jwks_client = jwt.PyJWKClient(SUPABASE_JWKS_URL, cache_keys=True, lifespan=3600)
+    return _jwks_client
+
+
+async def _decode(token):
+    import jwt
+
+    try:
+        if SUPABASE_JWT_SECRET:
+            key, algorithms = SUPABASE_JWT_SECRET, ["HS256"]
+        else:
+            # Only the first sight of a new signing key fetches the JWKS (a blocking call), so do it off the loop
+            try:
+                key = (await asyncio.to_thread(_get_jwks_client().get_signing_key_from_jwt, token)).key
+            except jwt.PyJWKClientConnectionError as e:
+                raise AuthUnavailable(f"Could not fetch the JWKS: {e}")
+            except jwt.PyJWKClientError as e:
+                raise _KeyNotInJWKS(str(e))
+            algorithms = _ASYMMETRIC_ALGORITHMS
+        return _decode_with(token, key, algorithms)
+    except jwt.PyJWTError as e:
+        raise InvalidToken(str(e))
+
+
+def _decode_with(token, key, algorithms):
+    import jwt
+
+    return jwt.decode(
+        token, key, algorithms=algorithms, audience=JWT_AUDIENCE, leeway=JWT_LEEWAY_SECONDS,
+        options={"require": ["exp", "sub"]},
+    )
+
+
+def _cached_jwks_key(token):
+    """The token's signing key if the JWKS was already fetched and holds it; never fetches it."""
+    import jwt
+
+    if _jwks_client is None or _jwks_client.jwk_set_cache is None:
+        return None
+    jwk_set = _jwks_client.jwk_set_cache.get()
+    if jwk_set is None:
+        return None
+    kid = jwt.get_unverified_header(token).get("kid")
+    for jwk in jwk_set.keys:
+        if jwk.key_id == kid:
+            return jwk.key
+    return None
+
+
+def _from_claims(claims):
+    return AuthenticatedUser(claims["sub"], claims.get("email"), claims.get("role", "authenticated"), claims)
+
+
+def _from_remote(user):
+    return AuthenticatedUser(user.id, getattr(user, "email", None), getattr(user, "role", None) or "authenticated", {})
+
+
+def _unverified_ttl(token):
+    """Seconds until the token's own exp (read without checking the signature), capped at AUTH_CACHE_TTL_SECONDS."""
+    import jwt
+
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.PyJWTError:
+        exp = None
+    if not isinstance(exp, (int, float)):
+        return AUTH_CACHE_TTL_SECONDS
+    return min(AUTH_CACHE_TTL_SECONDS, exp - time.time())
+
+
+async def _verify_remotely(token, fetch_user):
+    user = _from_remote(await _remote_user(token, fetch_user))
+    return user, _unverified_ttl(token)
+
+
+async def verify_token(token: str, fetch_user) -> AuthenticatedUser:
+    """
+    The user a bearer token belongs to. Tokens already verified come from an in-memory cache
+    (never past their own exp), so the common case is a dict lookup. `fetch_user` is an async
+    callable that asks Supabase; it is used when no key is configured, for tokens whose key
+    isn't in the JWKS, and for the optional recheck. Raises InvalidToken or AuthUnavailable.
+    """
+    if not token:
+        raise InvalidToken("Missing bearer token")
+
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    entry = verified_tokens.get(key)
+    now = time.monotonic()
+
+    if entry is None:
+        if verification_mode() == "remote":
+            user, ttl = await _verify_remotely(token, fetch_user)
+        else:
+            try:
+                claims = await _decode(token)
+            except _KeyNotInJWKS:
+                user, ttl = await _verify_remotely(token, fetch_user)
+            else:
+                user = _from_claims(claims)
+                ttl = claims["exp"] - time.time()
+                if ttl <= 0:
+                    raise InvalidToken("Signature has expired")
+        # Never cache past the token's exp (a remotely checked token right at its expiry isn't cached at all)
+        if ttl > 0:
+            verified_tokens.set(key, {"user": user, "checked_at": now}, ttl_seconds=ttl)
+        return user
+
+    if AUTH_REMOTE_RECHECK_SECONDS and now - entry["checked_at"] >= AUTH_REMOTE_RECHECK_SECONDS:
+        try:
+            await _remote_user(token, fetch_user)
+        except InvalidToken:
+            verified_tokens.delete(key)
+            raise
+        entry["checked_at"] = now
+    return entry["user"]
+
+
+def known_user(token: str):
+    """
+    The user a token belongs to if that is known without calling out: the token is in the
+    verified cache, or checks out against the secret or an already fetched JWKS key.
+    None otherwise (including for bad tokens). Cheap enough to run before every rate-limit take.
+    """
+    if not token:
+        return None
+    entry = verified_tokens.get(hashlib.sha256(token.encode("utf-8")).hexdigest())
+    if entry is not None:
+        return entry["user"]
+
+    import jwt
+
+    try:
+        if SUPABASE_JWT_SECRET:
+            return _from_claims(_decode_with(token, SUPABASE_JWT_SECRET, ["HS256"]))
+        if SUPABASE_JWKS_URL:
+            key = _cached_jwks_key(token)
+            if key is not None:
+                return _from_claims(_decode_with(token, key, _ASYMMETRIC_ALGORITHMS))
+    except jwt.PyJWTError:
+        pass
+    return None
+
+
+async def _remote_user(token, fetch_user):
+    try:
+        response = await fetch_user(token)
+    except Exception as e:
+        raise InvalidToken(str(e))
+    if not response or not response.user:
+        raise InvalidToken("Invalid or expired token")
+    return response.user
+
+
+def auth_stats():
+    return {"mode": verification_mode(), "remote_recheck_seconds": AUTH_REMOTE_RECHECK_SECONDS, **verified_tokens.stats()}
@@ -0,0 +1,165 @@
+import asyncio
+import os
+import random
+import threading
+from collections import deque
+
+from utils import repositories as db
+
+# Off by default: the buffer is flushed by a background task on a long-lived event loop and on
+# shutdown, neither of which a serverless invocation (Vercel) gets, so rows would sit there and be
+# lost. Turn it on only behind a persistent server (uvicorn/gunicorn); otherwise rows are written
+# per request as before.
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() == "true"
+# A batch is written as soon as it has this many rows, or after this long, whichever comes first
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "50"))
+WRITE_BEHIND_FLUSH_MS = float(os.getenv("WRITE_BEHIND_FLUSH_MS", "250"))
+# Rows beyond this many waiting are dropped (and counted) instead of growing memory during an outage
+WRITE_BEHIND_MAX_BUFFER = int(os.getenv("WRITE_BEHIND_MAX_BUFFER", "10000"))
+WRITE_BEHIND_MAX_RETRIES = int(os.getenv("WRITE_BEHIND_MAX_RETRIES", "3"))
+WRITE_BEHIND_RETRY_BASE_SECONDS = float(os.getenv("WRITE_BEHIND_RETRY_BASE_SECONDS", "0.5"))
+WRITE_BEHIND_RETRY_MAX_SECONDS = float(os.getenv("WRITE_BEHIND_RETRY_MAX_SECONDS", "5"))
+
+
+class WriteBehindBuffer:
+    """
+    Collects rows in memory and bulk-inserts them from a background task, so request
+    handlers never wait on the database. Failed batches are retried with capped, jittered
+    backoff; after the last retry the rows are dropped and counted.
+    """
+
+    def __init__(self, name, write_batch, batch_size=None, flush_ms=None, max_buffer=None, max_retries=None):
+        self.name = name
+        self._write_batch = write_batch
+        self.batch_size = batch_size or WRITE_BEHIND_BATCH_SIZE
+        self.flush_seconds = (flush_ms or WRITE_BEHIND_FLUSH_MS) / 1000
+        self.max_buffer = max_buffer or WRITE_BEHIND_MAX_BUFFER
+        self.max_retries = WRITE_BEHIND_MAX_RETRIES if max_retries is None else max_retries
+        self._rows = deque()
+        self._lock = threading.Lock()
+        self._batch_ready = None
+        self._task = None
+        self._loop = None
+        self._in_flight = 0  # rows taken out of the buffer and not yet written or dropped
+        self._closing = False
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.failed_batches = 0
+        self.dropped = 0
+        self.peak_buffered = 0
+
+    def add(self, row) -> bool:
+        """Queues one row. Returns False (and counts it as dropped) if the buffer is full."""
+        with self._lock:
+            if len(self._rows) >= self.max_buffer:
+                self.dropped += 1
+                return False
+            self._rows.append(row)
+            self.peak_buffered = max(self.peak_buffered, len(self._rows))
+            full = len(self._rows) >= self.batch_size
+
+        self._ensure_running()
+        if full:
+            self._batch_ready.set()
+        return True
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and not self._task.done():
+            return
+        if self._loop is not None and self._loop.is_closed():
+            # The loop our task ran on is gone, and with it any batch it was writing
+            with self._lock:
+                self.dropped += self._in_flight
+                self._in_flight = 0
+        self._loop = loop
+        self._batch_ready = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            await self.flush()
+            if self._closing:
+                return
+
+    def _take_batch(self):
+        with self._lock:
+            batch = [self._rows.popleft() for _ in range(min(self.batch_size, len(self._rows)))]
+            self._in_flight += len(batch)
+            return batch
+
+    def _settled(self, batch, written):
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - len(batch))
+            if written:
+                self.written += len(batch)
+                self.batches += 1
+            else:
+                self.failed_batches += 1
+                self.dropped += len(batch)
+
+    async def flush(self):
+        """Writes everything buffered right now, one bulk insert per batch."""
+        batch = self._take_batch()
+        while batch:
+            await self._write(batch)
+            batch = self._take_batch()
+
+    async def _write(self, batch):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self._write_batch(batch)
+                self._settled(batch, True)
+                return
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    self._settled(batch, False)
+                    print(f"Database warning: dropped {len(batch)} {self.name} rows after {attempt + 1} attempts. {e}")
+                    return
+                self.retries += 1
+                delay = min(WRITE_BEHIND_RETRY_MAX_SECONDS, WRITE_BEHIND_RETRY_BASE_SECONDS * (2 ** attempt))
+                await asyncio.sleep(random.uniform(0, delay))
+
+    async def close(self):
+        """Stops the background task after writing whatever is still buffered (called on app shutdown)."""
+        self._closing = True
+        if self._loop is asyncio.get_running_loop() and not self._task.done():
+            self._batch_ready.set()
+            await self._task
+        await self.flush()
+
+    def stats(self):
+        with self._lock:
+            buffered = len(self._rows)
+            in_flight = self._in_flight
+        return {
+            "enabled": WRITE_BEHIND_ENABLED,
+            "buffered": buffered,
+            "in_flight": in_flight,
+            "peak_buffered": self.peak_buffered,
+            "written": self.written,
+            "batches": self.batches,
+            "retries": self.retries,
+            "failed_batches": self.failed_batches,
+            "dropped": self.dropped,
+        }
+
+
+# Looked up through the repositories module on every flush, so repositories.configure() still applies
+evaluation_writes = WriteBehindBuffer("evaluations", lambda rows: db.evaluations.add_many(rows))
+history_writes = WriteBehindBuffer("resume_history", lambda rows: db.history.add_many(rows))
+
+
+async def close_write_buffers():
+    await evaluation_writes.close()
+    await history_writes.close()
+
+
+def write_buffer_stats():
+    return {buffer.name: buffer.stats() for buffer in (evaluation_writes, history_writes)}